@@ -0,0 +1,94 @@
+"""Pairwise word-distance and confusion matrices: per-pair Python loops vs. the batched rapidfuzz engine.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_distance
+    python -m benchmarks.bench_distance --sizes 10 100 1000 5000 --loop-max 1000
+"""
+import argparse
+import random
+import string
+import time
+
+import Levenshtein
+import numpy as np
+import pandas as pd
+
+from distance import distance_matrix, rounded_rows, similarity_matrix
+
+
+def loop_distance_matrix(words):
+    size = len(words)
+    dist_matrix = np.zeros((size, size))
+    for i in range(size):
+        for j in range(i + 1, size):
+            dist = Levenshtein.distance(words[i], words[j])
+            dist_matrix[i, j] = dist_matrix[j, i] = dist
+    return dist_matrix
+
+
+def pandas_confusion_matrix(ipa_variants):
+    size = len(ipa_variants)
+    matrix = pd.DataFrame(index=ipa_variants, columns=ipa_variants)
+    for i in range(size):
+        for j in range(size):
+            if ipa_variants[i] == ipa_variants[j]:
+                matrix.iloc[i, j] = 1.0
+            else:
+                dist = Levenshtein.distance(ipa_variants[i], ipa_variants[j])
+                max_len = max(len(ipa_variants[i]), len(ipa_variants[j]))
+                matrix.iloc[i, j] = round(1 - dist / max_len, 2)
+    return matrix.values.tolist()
+
+
+def random_words(n, seed=0):
+    rng = random.Random(seed)
+    words = set()
+    while len(words) < n:
+        words.add("".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 12))))
+    return list(words)
+
+
+def best_of(fn, repeats):
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 50, 100, 500, 1000, 2000, 5000])
+    parser.add_argument("--loop-max", type=int, default=1000, help="largest size to time the Python loop at")
+    parser.add_argument("--pandas-max", type=int, default=200, help="largest size to time the pandas builder at")
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'words':>6} {'loop (s)':>10} {'batched (s)':>12} {'speedup':>8}")
+    for n in args.sizes:
+        words = random_words(n)
+        batched_s, batched = best_of(lambda: distance_matrix(words), args.repeats)
+        if n <= args.loop_max:
+            loop_s, loop = best_of(lambda: loop_distance_matrix(words), 1)
+            assert np.array_equal(loop, batched), "batched distances differ from the reference loop"
+            print(f"{n:>6} {loop_s:>10.4f} {batched_s:>12.4f} {loop_s / batched_s:>7.1f}x")
+        else:
+            print(f"{n:>6} {'-':>10} {batched_s:>12.4f} {'-':>8}")
+
+    print("\nConfusion matrix, including conversion to JSON-ready lists")
+    print(f"{'words':>6} {'pandas (s)':>10} {'batched (s)':>12} {'speedup':>8}")
+    for n in args.sizes:
+        words = random_words(n)
+        batched_s, batched = best_of(lambda: rounded_rows(similarity_matrix(words)), args.repeats)
+        if n <= args.pandas_max:
+            pandas_s, reference = best_of(lambda: pandas_confusion_matrix(words), 1)
+            assert reference == batched, "batched confusion matrix differs from the pandas reference"
+            print(f"{n:>6} {pandas_s:>10.4f} {batched_s:>12.4f} {pandas_s / batched_s:>7.1f}x")
+        else:
+            print(f"{n:>6} {'-':>10} {batched_s:>12.4f} {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
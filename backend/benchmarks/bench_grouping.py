@@ -0,0 +1,76 @@
+"""Target-word grouping: full complete-linkage clustering vs. the target-focused mode.
+
+Checks that both modes put the same words in the target's group and times
+them on transcripts of increasing size. Transcripts are synthetic (a
+vocabulary plus one-edit misspellings) unless --transcript gives a text file.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_grouping
+    python -m benchmarks.bench_grouping --transcript fixtures/long_recording.txt --targets day way
+"""
+import argparse
+import random
+import string
+import time
+
+from pipeline import cluster_target_word, cluster_target_word_full
+
+
+def misspell(word, rng):
+    i = rng.randrange(len(word))
+    edit = rng.choice(("substitute", "delete", "insert"))
+    if edit == "substitute":
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+    if edit == "delete" and len(word) > 1:
+        return word[:i] + word[i + 1:]
+    return word[:i] + rng.choice(string.ascii_lowercase) + word[i:]
+
+
+def synthetic_transcript(unique_target, seed=0):
+    """Words of a transcript with about `unique_target` unique words."""
+    rng = random.Random(seed)
+    base = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(2, 9))) for _ in range(unique_target // 2)]
+    words = []
+    while len(set(words)) < unique_target:
+        word = rng.choice(base)
+        words.append(misspell(word, rng) if rng.random() < 0.3 else word)
+    return words
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 200, 1000, 3000], help="unique words per synthetic transcript")
+    parser.add_argument("--transcript", help="text file to use instead of synthetic transcripts")
+    parser.add_argument("--targets", nargs="+", help="target words (default: 5 random words of each transcript)")
+    args = parser.parse_args()
+
+    if args.transcript:
+        with open(args.transcript, encoding="utf-8") as f:
+            transcripts = [f.read().lower().split()]
+    else:
+        transcripts = [synthetic_transcript(n, seed=n) for n in args.sizes]
+
+    mismatches = 0
+    print(f"{'unique':>7} {'target':>12} {'full (s)':>9} {'focused (s)':>12} {'speedup':>8} {'group':>6}")
+    for words in transcripts:
+        targets = args.targets or random.Random(0).sample(sorted(set(words)), 5)
+        for target in targets:
+            full_s, full = timed(cluster_target_word_full, words, target)
+            focused_s, focused = timed(cluster_target_word, words, target)
+            if full != focused:
+                mismatches += 1
+                print(f"  MISMATCH for {target!r}: full={sorted(full or [])} focused={sorted(focused or [])}")
+            print(f"{len(set(words)):>7} {target:>12} {full_s:>9.4f} {focused_s:>12.4f} {full_s / focused_s:>7.1f}x {len(focused or []):>6}")
+    print(f"{mismatches} mismatch(es)")
+    raise SystemExit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
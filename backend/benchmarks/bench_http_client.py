@@ -0,0 +1,109 @@
+"""Backend -> voxpreference call latency: a new AsyncClient per call vs. the shared pooled client.
+
+Starts a local stub of the transcription service (uvicorn on 127.0.0.1) that
+answers after a fixed delay, then sends the same concurrent load through both
+client setups and reports latency percentiles and TCP connections opened.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_http_client
+    python -m benchmarks.bench_http_client --requests 2000 --concurrency 64 --delay-ms 20
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+import uvicorn
+
+from http_client import ClientStats, create_client
+
+AUDIO = b"\0" * 64 * 1024
+
+
+def stub_app(delay_s):
+    body = json.dumps({"success": True, "segments": [{"text": "day", "ipa": "dˈeɪ"}]}).encode()
+
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        more_body = True
+        while more_body:
+            message = await receive()
+            more_body = message.get("more_body", False)
+        await asyncio.sleep(delay_s)
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]})
+        await send({"type": "http.response.body", "body": body})
+
+    return app
+
+
+async def run_load(requests, concurrency, make_request):
+    latencies = []
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await make_request()
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+    latencies.sort()
+    pick = lambda q: latencies[min(len(latencies) - 1, int(len(latencies) * q / 100))] * 1000
+    return {"p50_ms": pick(50), "p95_ms": pick(95), "p99_ms": pick(99), "requests_per_s": requests / wall}
+
+
+async def main_async(args):
+    config = uvicorn.Config(stub_app(args.delay_ms / 1000), host="127.0.0.1", port=args.port, log_level="warning")
+    server = uvicorn.Server(config)
+    serve = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    url = f"http://127.0.0.1:{args.port}/"
+
+    try:
+        fresh_stats = ClientStats()
+
+        async def fresh_client_request():
+            async with httpx.AsyncClient() as client:
+                return await client.post(url, files={"audioFile": AUDIO}, extensions={"trace": fresh_stats.trace})
+
+        fresh = await run_load(args.requests, args.concurrency, fresh_client_request)
+        fresh["connections_opened"] = fresh_stats.connections_opened
+
+        shared_stats = ClientStats()
+        async with create_client() as client:
+            async def shared_client_request():
+                return await client.post(url, files={"audioFile": AUDIO}, extensions={"trace": shared_stats.trace})
+
+            shared = await run_load(args.requests, args.concurrency, shared_client_request)
+        shared["connections_opened"] = shared_stats.connections_opened
+    finally:
+        server.should_exit = True
+        await serve
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, stub delay {args.delay_ms} ms")
+    for name, result in (("client per call", fresh), ("shared pool", shared)):
+        print(
+            f"{name:>16}: p50 {result['p50_ms']:7.1f} ms  p95 {result['p95_ms']:7.1f} ms  p99 {result['p99_ms']:7.1f} ms  "
+            f"{result['requests_per_s']:7.1f} req/s  {result['connections_opened']} connections"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--delay-ms", type=float, default=10, help="stub service processing time")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+import math
+from collections import defaultdict
+
+import numpy as np
+from rapidfuzz import process
+from rapidfuzz.distance import Levenshtein
+
+# Threads used for batched distance computation; -1 uses every core.
+DISTANCE_WORKERS = -1
+
+
+def distance_matrix(words, workers=DISTANCE_WORKERS):
+    """Square int32 matrix of Levenshtein distances between all pairs of words.
+
+    Computed in native code across `workers` threads. Passing the same list as
+    queries and choices lets rapidfuzz compute only one triangle and mirror it.
+    This is the precomputed form complete_linkage_labels takes.
+    """
+    words = list(words)
+    if not words:
+        return np.zeros((0, 0), dtype=np.int32)
+    return process.cdist(words, words, scorer=Levenshtein.distance, dtype=np.int32, workers=workers)
+
+
+def similarity_matrix(variants, workers=DISTANCE_WORKERS):
+    """Square float32 matrix of 1 - distance / max(len) for all pairs, with 1.0 on the diagonal.
+
+    One batched cdist call; as in distance_matrix, only one triangle is computed.
+    """
+    variants = list(variants)
+    if not variants:
+        return np.zeros((0, 0), dtype=np.float32)
+    matrix = process.cdist(
+        variants, variants, scorer=Levenshtein.normalized_similarity, dtype=np.float32, workers=workers
+    )
+    np.fill_diagonal(matrix, 1.0)
+    return matrix
+
+
+def rounded_rows(matrix, decimals=2):
+    """Nested lists of Python floats rounded to `decimals`, ready for JSON."""
+    return np.round(matrix.astype(np.float64), decimals).tolist()
+
+
+def complete_linkage_labels(matrix, distance_threshold):
+    """Cluster labels from complete-linkage clustering of a square distance matrix.
+
+    Like AgglomerativeClustering(linkage='complete', distance_threshold=...),
+    the closest pair of clusters is merged while its distance is below the
+    threshold, but ties are always broken the same way: the pair whose
+    first-listed members come first in the matrix order wins. The merges
+    inside one connected component of the "distance < threshold" graph
+    therefore do not depend on the rest of the matrix, so clustering a
+    component on its own gives the same groups as clustering everything.
+    Labels are numbered in order of each cluster's first member.
+    """
+    n = len(matrix)
+    distances = np.array(matrix, dtype=np.float64)
+    np.fill_diagonal(distances, np.inf)
+    # A cluster is identified by its first member; row_min/row_arg cache each row's
+    # smallest distance and the first column where it occurs.
+    owner = np.arange(n)
+    row_min = distances.min(axis=1) if n else np.zeros(0)
+    row_arg = distances.argmin(axis=1) if n else np.zeros(0, dtype=np.intp)
+    while n > 1:
+        i = int(np.argmin(row_min))
+        if not row_min[i] < distance_threshold:
+            break
+        j = int(row_arg[i])
+        # i < j: the first row holding the overall minimum is the pair's first member.
+        merged = np.maximum(distances[i], distances[j])
+        merged[i] = np.inf
+        distances[i], distances[:, i] = merged, merged
+        distances[j], distances[:, j] = np.inf, np.inf
+        row_min[j] = np.inf
+        owner[owner == j] = i
+        # Merging only raises distances to i and j, so only rows whose minimum sat there need a rescan.
+        stale = np.flatnonzero((row_arg == i) | (row_arg == j))
+        stale = stale[stale != j]
+        rescan = np.union1d(stale, [i])
+        row_min[rescan] = distances[rescan].min(axis=1)
+        row_arg[rescan] = distances[rescan].argmin(axis=1)
+    _, labels = np.unique(owner, return_inverse=True)
+    return labels
+
+
+def neighbourhood(words, target, distance_threshold):
+    """Words connected to `target` through chains of pairs closer than `distance_threshold`.
+
+    This is the target's connected component in the "distance < threshold"
+    graph, found by a breadth-first search that only compares each word with
+    unvisited words of compatible length (the length difference is a lower
+    bound on the edit distance). Complete-linkage clustering with that
+    threshold never merges across components, so the target's cluster lies
+    inside this set. Returned in the order of `words`.
+    """
+    max_distance = math.ceil(distance_threshold) - 1
+    by_length = defaultdict(set)
+    for word in words:
+        by_length[len(word)].add(word)
+    by_length[len(target)].discard(target)
+
+    component = {target}
+    frontier = [target]
+    while frontier:
+        word = frontier.pop()
+        candidates = [
+            candidate
+            for length in range(len(word) - max_distance, len(word) + max_distance + 1)
+            for candidate in by_length.get(length, ())
+        ]
+        if not candidates:
+            continue
+        matches = process.extract(
+            word, candidates, scorer=Levenshtein.distance, score_cutoff=max_distance, limit=None
+        )
+        for match, _, _ in matches:
+            by_length[len(match)].discard(match)
+            component.add(match)
+            frontier.append(match)
+    return [word for word in words if word in component]
@@ -0,0 +1,135 @@
+import logging
+import os
+import threading
+import time
+import uuid
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Connection pool for calls to the voxpreference service, shared by all requests.
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "32"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "16"))
+HTTP_KEEPALIVE_EXPIRY_S = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_S", "60"))
+HTTP_CONNECT_TIMEOUT_S = float(os.getenv("HTTP_CONNECT_TIMEOUT_S", "5"))
+HTTP_POOL_TIMEOUT_S = float(os.getenv("HTTP_POOL_TIMEOUT_S", "30"))
+# Per-endpoint read timeouts: transcription of a long upload takes far longer than an IPA lookup.
+TRANSCRIBE_TIMEOUT_S = float(os.getenv("TRANSCRIBE_TIMEOUT_S", "300"))
+IPA_TIMEOUT_S = float(os.getenv("IPA_TIMEOUT_S", "10"))
+# Size of the pieces an upload is relayed in.
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(256 * 1024)))
+
+
+def endpoint_timeout(read_s):
+    return httpx.Timeout(connect=HTTP_CONNECT_TIMEOUT_S, read=read_s, write=read_s, pool=HTTP_POOL_TIMEOUT_S)
+
+
+TIMEOUTS = {
+    "transcribe": endpoint_timeout(TRANSCRIBE_TIMEOUT_S),
+    "ipa": endpoint_timeout(IPA_TIMEOUT_S),
+}
+
+
+def create_client():
+    """App-lifetime AsyncClient with a bounded keep-alive connection pool."""
+    limits = httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_S
+    )
+    logger.info(
+        f"HTTP client pool: max_connections={HTTP_MAX_CONNECTIONS}, keepalive={HTTP_MAX_KEEPALIVE}, "
+        f"expiry={HTTP_KEEPALIVE_EXPIRY_S}s"
+    )
+    return httpx.AsyncClient(limits=limits, timeout=endpoint_timeout(TRANSCRIBE_TIMEOUT_S))
+
+
+def multipart_upload(field, upload, chunk_size=UPLOAD_CHUNK_SIZE):
+    """Headers and an async body generator that relay an UploadFile as a one-file multipart form.
+
+    The upload is read and sent `chunk_size` bytes at a time, so at most one
+    chunk of it is held in memory here. With a known upload size the body is
+    sent with a Content-Length, otherwise with chunked transfer encoding.
+    """
+    boundary = uuid.uuid4().hex
+    filename = (upload.filename or "audio.wav").replace('"', "%22").replace("\r", "").replace("\n", "")
+    content_type = (upload.content_type or "application/octet-stream").replace("\r", "").replace("\n", "")
+    head = (
+        f"--{boundary}\r\n"
+        f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode()
+    tail = f"\r\n--{boundary}--\r\n".encode()
+
+    async def body():
+        await upload.seek(0)
+        yield head
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+        yield tail
+
+    headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+    size = getattr(upload, "size", None)
+    if size is not None:
+        headers["Content-Length"] = str(len(head) + size + len(tail))
+    return headers, body()
+
+
+class ClientStats:
+    """Per-endpoint request counts and latency, plus how many requests needed a new TCP connection."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.endpoints = {}
+        self.connections_opened = 0
+
+    async def trace(self, event_name, info):
+        # httpx "trace" extension: fired by httpcore for each connection/request step.
+        if event_name == "connection.connect_tcp.complete":
+            with self._lock:
+                self.connections_opened += 1
+
+    def record(self, endpoint, seconds, ok):
+        with self._lock:
+            stats = self.endpoints.setdefault(endpoint, {"requests": 0, "errors": 0, "total_s": 0.0, "max_s": 0.0})
+            stats["requests"] += 1
+            stats["errors"] += 0 if ok else 1
+            stats["total_s"] += seconds
+            stats["max_s"] = max(stats["max_s"], seconds)
+
+    def snapshot(self):
+        with self._lock:
+            requests = sum(stats["requests"] for stats in self.endpoints.values())
+            return {
+                "requests": requests,
+                "connections_opened": self.connections_opened,
+                "connection_reuse_ratio": round(1 - self.connections_opened / requests, 3) if requests else None,
+                "endpoints": {
+                    name: {
+                        "requests": stats["requests"],
+                        "errors": stats["errors"],
+                        "mean_s": round(stats["total_s"] / stats["requests"], 4),
+                        "max_s": round(stats["max_s"], 4)
+                    }
+                    for name, stats in self.endpoints.items()
+                }
+            }
+
+
+client_stats = ClientStats()
+
+
+async def post(client, endpoint, url, **kwargs):
+    """POST through the shared client with the endpoint's timeout, recording latency and connection reuse."""
+    started = time.perf_counter()
+    ok = False
+    try:
+        response = await client.post(url, timeout=TIMEOUTS[endpoint], extensions={"trace": client_stats.trace}, **kwargs)
+        ok = response.status_code < 500
+        return response
+    finally:
+        client_stats.record(endpoint, time.perf_counter() - started, ok)
@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from collections import OrderedDict, deque
+
+from starlette.datastructures import Headers, UploadFile
+
+from pipeline import analyze_audio_and_word
+
+logger = logging.getLogger(__name__)
+
+# Analyses run at the same time; each one spends most of its time waiting on voxpreference.
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+# Jobs that may wait for a worker; beyond this, submissions are rejected with 503.
+JOB_QUEUE_DEPTH = int(os.getenv("JOB_QUEUE_DEPTH", "64"))
+# Finished jobs kept for polling, oldest evicted first, and for at most JOB_TTL_S seconds.
+JOB_STORE_SIZE = int(os.getenv("JOB_STORE_SIZE", "1000"))
+JOB_TTL_S = float(os.getenv("JOB_TTL_S", "3600"))
+# Uploads up to this size are held in memory while queued, larger ones in a temp file.
+JOB_SPOOL_MAX_MEMORY = int(os.getenv("JOB_SPOOL_MAX_MEMORY", str(1024 * 1024)))
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, target_word, upload):
+        self.id = uuid.uuid4().hex
+        self.target_word = target_word
+        self.upload = upload
+        self.status = "queued"
+        self.stage = None
+        self.result = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.stage_timings = {}
+        self.changed = asyncio.Event()
+
+    def as_dict(self):
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "stage": self.stage,
+            "target_word": self.target_word,
+            "queue_wait_s": round(self.started - self.created, 3) if self.started else None,
+            "stage_timings_s": {name: round(seconds, 3) for name, seconds in self.stage_timings.items()},
+            "result": self.result
+        }
+
+    def notify(self):
+        # Wake every waiting event stream, then arm a fresh event for the next change.
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+class StageStats:
+    """Count, mean and max latency of queue wait, each pipeline stage and whole jobs."""
+
+    def __init__(self):
+        self.timings = {}
+
+    def observe(self, name, seconds):
+        timing = self.timings.setdefault(name, {"count": 0, "total_s": 0.0, "max_s": 0.0})
+        timing["count"] += 1
+        timing["total_s"] += seconds
+        timing["max_s"] = max(timing["max_s"], seconds)
+
+    def snapshot(self):
+        return {
+            name: {"count": t["count"], "mean_s": round(t["total_s"] / t["count"], 4), "max_s": round(t["max_s"], 4)}
+            for name, t in self.timings.items()
+        }
+
+
+async def spool_upload(upload, max_memory=JOB_SPOOL_MAX_MEMORY):
+    """Copy a request's UploadFile into one the job owns, since FastAPI closes the original with the response."""
+    spooled = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    try:
+        await upload.seek(0)
+        await asyncio.get_running_loop().run_in_executor(None, shutil.copyfileobj, upload.file, spooled)
+        spooled.seek(0)
+    except Exception:
+        spooled.close()
+        raise
+    headers = Headers({"content-type": upload.content_type or "application/octet-stream"})
+    return UploadFile(file=spooled, filename=upload.filename, size=upload.size, headers=headers)
+
+
+class JobQueue:
+    """In-process queue of /analyze jobs served by a fixed pool of asyncio workers."""
+
+    def __init__(self, client, workers=JOB_WORKERS, max_queue=JOB_QUEUE_DEPTH, max_jobs=JOB_STORE_SIZE, ttl_s=JOB_TTL_S):
+        self.client = client
+        self.num_workers = workers
+        self.max_jobs = max_jobs
+        self.ttl_s = ttl_s
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.jobs = OrderedDict()
+        # Ids of finished jobs in the order they finished: the eviction order.
+        self._finished = deque()
+        self.stats = StageStats()
+        self.running = 0
+        self.rejected = 0
+        self._workers = []
+
+    def start(self):
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.num_workers)]
+        logger.info(f"Job queue: {self.num_workers} workers, queue depth {self.queue.maxsize}")
+
+    async def stop(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        while not self.queue.empty():
+            await self.queue.get_nowait().upload.close()
+
+    def submit(self, target_word, upload):
+        """Queue an analysis of an upload this queue now owns; raises QueueFull when saturated."""
+        job = Job(target_word, upload)
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFull(f"{self.queue.qsize()} jobs already queued")
+        self.jobs[job.id] = job
+        self._evict()
+        return job
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def _evict(self):
+        """Drop finished jobs past their TTL, then the longest-finished ones while over max_jobs.
+
+        Queued and running jobs are never dropped, and don't hold back the
+        eviction of jobs that finished after they were submitted.
+        """
+        now = time.time()
+        while self._finished:
+            oldest = self.jobs[self._finished[0]]
+            if now - oldest.finished <= self.ttl_s and len(self.jobs) <= self.max_jobs:
+                break
+            del self.jobs[self._finished.popleft()]
+
+    async def _worker(self, index):
+        while True:
+            job = await self.queue.get()
+            self.running += 1
+            try:
+                await self._run(job)
+            finally:
+                self.running -= 1
+                self.queue.task_done()
+
+    async def _run(self, job):
+        job.started = time.time()
+        self.stats.observe("queue_wait", job.started - job.created)
+        job.status = "running"
+        job.notify()
+        stage_started = [time.perf_counter()]
+
+        def on_stage(name):
+            now = time.perf_counter()
+            if job.stage is not None:
+                self._finish_stage(job, now - stage_started[0])
+            job.stage, stage_started[0] = name, now
+            job.notify()
+
+        try:
+            job.result = await analyze_audio_and_word(job.upload, job.target_word, self.client, on_stage=on_stage)
+            job.status = "done" if job.result.get("success") else "failed"
+        except Exception as e:
+            logger.exception(f"Job {job.id} failed: {e}")
+            job.result = {"success": False, "error": str(e)}
+            job.status = "failed"
+        finally:
+            await job.upload.close()
+            if job.stage is not None:
+                self._finish_stage(job, time.perf_counter() - stage_started[0])
+            job.upload = None
+            job.stage = None
+            job.finished = time.time()
+            self._finished.append(job.id)
+            self.stats.observe("job_total", job.finished - job.started)
+            job.notify()
+            self._evict()
+
+    def _finish_stage(self, job, seconds):
+        job.stage_timings[job.stage] = seconds
+        self.stats.observe(f"stage_{job.stage}", seconds)
+
+    def snapshot(self):
+        statuses = {}
+        for job in self.jobs.values():
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "running": self.running,
+            "workers": self.num_workers,
+            "rejected_total": self.rejected,
+            "jobs_by_status": statuses,
+            "latency": self.stats.snapshot()
+        }
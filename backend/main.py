@@ -1,14 +1,36 @@
+import asyncio
+import json
 import logging
-from fastapi import FastAPI, File, UploadFile, Form, HTTPException
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from pipeline import analyze_audio_and_word, get_word_ipa
+from http_client import client_stats, create_client
+from jobs import JobQueue, QueueFull, spool_upload
 from logging_config import setup_logging
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+# Audio uploads to /analyze and /jobs use Starlette's default spooling: in memory up to
+# 1 MB, then an anonymous temp file that is removed when the request finishes. They are
+# then relayed to voxpreference in chunks.
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # One pooled client for all calls to voxpreference, so connections are kept alive and reused.
+    app.state.http_client = create_client()
+    app.state.jobs = JobQueue(app.state.http_client)
+    app.state.jobs.start()
+    try:
+        yield
+    finally:
+        await app.state.jobs.stop()
+        await app.state.http_client.aclose()
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -19,10 +41,10 @@ app.add_middleware(
 )
 
 @app.post("/analyze")
-async def analyze(audioFile: UploadFile = File(...), target_word: str = Form(...)):
+async def analyze(request: Request, audioFile: UploadFile = File(...), target_word: str = Form(...)):
     logger.info(f"Received /analyze request: audioFile={audioFile.filename}, target_word={target_word}")
     try:
-        result = await analyze_audio_and_word(audioFile, target_word)
+        result = await analyze_audio_and_word(audioFile, target_word, request.app.state.http_client)
         logger.info(f"Analysis result: {result}")
         return JSONResponse(content=result)
     except Exception as e:
@@ -30,12 +52,72 @@ async def analyze(audioFile: UploadFile = File(...), target_word: str = Form(...
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/ipa")
-async def ipa(target_word: str = Form(...)):
+async def ipa(request: Request, target_word: str = Form(...)):
     logger.info(f"Received /ipa request: target_word={target_word}")
     try:
-        result = await get_word_ipa(target_word)
+        result = await get_word_ipa(target_word, request.app.state.http_client)
         logger.info(f"IPA result: {result}")
         return JSONResponse(content=result)
     except Exception as e:
         logger.exception(f"Error in /ipa: {e}")
-        raise HTTPException(status_code=500, detail=str(e)) 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/jobs", status_code=202)
+async def submit_job(request: Request, audioFile: UploadFile = File(...), target_word: str = Form(...)):
+    """Queue an /analyze job and return its id immediately; poll /jobs/{id} or stream /jobs/{id}/events."""
+    logger.info(f"Received /jobs request: audioFile={audioFile.filename}, target_word={target_word}")
+    upload = await spool_upload(audioFile)
+    try:
+        job = request.app.state.jobs.submit(target_word, upload)
+    except QueueFull as e:
+        await upload.close()
+        logger.warning(f"Rejecting job, queue full: {e}")
+        return JSONResponse(
+            status_code=503,
+            content={"success": False, "error": "Job queue is full, retry later."},
+            headers={"Retry-After": "5"}
+        )
+    return JSONResponse(status_code=202, content={
+        "job_id": job.id,
+        "status": job.status,
+        "status_url": f"/jobs/{job.id}",
+        "events_url": f"/jobs/{job.id}/events"
+    })
+
+@app.get("/jobs/stats")
+async def job_stats(request: Request):
+    return request.app.state.jobs.snapshot()
+
+@app.get("/jobs/{job_id}")
+async def get_job(request: Request, job_id: str):
+    job = request.app.state.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job id.")
+    return job.as_dict()
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(request: Request, job_id: str):
+    """Server-sent events: the job's state on every status or stage change, ending when it finishes."""
+    job = request.app.state.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired job id.")
+
+    async def events():
+        while True:
+            changed = job.changed
+            yield f"event: {job.status}\ndata: {json.dumps(job.as_dict(), ensure_ascii=False)}\n\n"
+            if job.finished is not None:
+                return
+            while not changed.is_set():
+                if await request.is_disconnected():
+                    return
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+@app.get("/metrics")
+async def metrics(request: Request):
+    return {"http_client": client_stats.snapshot(), "jobs": request.app.state.jobs.snapshot()}
@@ -1,12 +1,8 @@
 import logging
-import tempfile
 import json
-import numpy as np
-import pandas as pd
-import Levenshtein
 from collections import Counter
-from sklearn.cluster import AgglomerativeClustering
-import httpx
+from http_client import multipart_upload, post
+from distance import complete_linkage_labels, distance_matrix, neighbourhood, rounded_rows, similarity_matrix
 import asyncio
 import aiofiles
 import os
@@ -14,30 +10,46 @@ import os
 # Use environment variables for service URLs in containerized environment
 VOXPREFERENCE_URL = os.getenv("VOXPREFERENCE_URL", "http://localhost:8000")
 TENENTS_URL = os.getenv("TENENTS_URL", "http://localhost:5000")
+# "target" clusters only the target word's neighbourhood; "full" clusters every transcript word.
+WORD_GROUPING = os.getenv("WORD_GROUPING", "target")
 
 logger = logging.getLogger(__name__)
 
 def compute_distance_matrix(words):
-    size = len(words)
-    dist_matrix = np.zeros((size, size))
-    for i in range(size):
-        for j in range(i + 1, size):
-            dist = Levenshtein.distance(words[i], words[j])
-            dist_matrix[i, j] = dist_matrix[j, i] = dist
-    return dist_matrix
+    return distance_matrix(words)
 
 def cluster_words(words, distance_threshold=2.0):
-    unique_words = list(set(words))
+    # First-occurrence order: ties in the clustering are broken in favour of earlier words.
+    unique_words = list(dict.fromkeys(words))
+    if len(unique_words) < 2:
+        return {word: 0 for word in unique_words}
     distance_matrix = compute_distance_matrix(unique_words)
-    clustering = AgglomerativeClustering(
-        n_clusters=None,
-        metric='precomputed',
-        linkage='complete',
-        distance_threshold=distance_threshold
-    )
-    labels = clustering.fit_predict(distance_matrix)
+    labels = complete_linkage_labels(distance_matrix, distance_threshold)
     return dict(zip(unique_words, labels))
 
+def cluster_target_word(words, target_word, distance_threshold=2.0):
+    """The set of words in target_word's complete-linkage cluster, or None if it isn't in `words`.
+
+    Only the target's neighbourhood (words linked to it by distances below the
+    threshold) is clustered, instead of every unique word. Because the
+    clustering breaks ties by word order, and the neighbourhood keeps that
+    order, the group is exactly the one cluster_target_word_full returns.
+    """
+    unique_words = list(dict.fromkeys(words))
+    if target_word not in unique_words:
+        return None
+    word_cluster_map = cluster_words(neighbourhood(unique_words, target_word, distance_threshold), distance_threshold)
+    target_cluster = word_cluster_map[target_word]
+    return {word for word, label in word_cluster_map.items() if label == target_cluster}
+
+def cluster_target_word_full(words, target_word, distance_threshold=2.0):
+    """Same result as cluster_target_word, computed by clustering every unique word."""
+    word_cluster_map = cluster_words(words, distance_threshold)
+    if target_word not in word_cluster_map:
+        return None
+    target_cluster = word_cluster_map[target_word]
+    return {word for word, label in word_cluster_map.items() if label == target_cluster}
+
 def format_output(variant_counts):
     total = sum(variant_counts.values())
     ipa_variants = list(variant_counts.keys())
@@ -45,36 +57,20 @@ def format_output(variant_counts):
     return ipa_variants, freq_dict
 
 def generate_confusion_matrix(ipa_variants):
-    size = len(ipa_variants)
-    matrix = pd.DataFrame(index=ipa_variants, columns=ipa_variants)
-    for i in range(size):
-        for j in range(size):
-            if ipa_variants[i] == ipa_variants[j]:
-                matrix.iloc[i, j] = 1.0
-            else:
-                dist = Levenshtein.distance(ipa_variants[i], ipa_variants[j])
-                max_len = max(len(ipa_variants[i]), len(ipa_variants[j]))
-                matrix.iloc[i, j] = round(1 - dist / max_len, 2)
-    return matrix
-
-async def analyze_audio_and_word(audioFile, target_word):
+    return similarity_matrix(ipa_variants)
+
+async def analyze_audio_and_word(audioFile, target_word, client, on_stage=None):
+    """Run the analysis pipeline; `on_stage(name)`, if given, is called as each stage starts."""
     logger.info("Starting analysis pipeline")
     loop = asyncio.get_running_loop()
+    on_stage = on_stage or (lambda name: None)
 
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as tmp:
-        tmp_path = tmp.name
-    
     try:
-        content = await audioFile.read()
-        async with aiofiles.open(tmp_path, "wb") as f:
-            await f.write(content)
-        logger.info(f"Saved uploaded audio to {tmp_path}")
-
-        async with aiofiles.open(tmp_path, "rb") as f:
-            files = {"audioFile": await f.read()}
-            logger.info("Sending audio to external API...")
-            async with httpx.AsyncClient() as client:
-                response = await client.post(VOXPREFERENCE_URL, files=files)
+        on_stage("transcribe")
+        # Relay the upload to the ASR service chunk by chunk instead of copying it into memory and a temp file.
+        headers, body = multipart_upload("audioFile", audioFile)
+        logger.info("Sending audio to external API...")
+        response = await post(client, "transcribe", VOXPREFERENCE_URL, content=body, headers=headers)
         
         if response.status_code != 200:
             logger.error(f"API error {response.status_code}: {response.text}")
@@ -85,29 +81,35 @@ async def analyze_audio_and_word(audioFile, target_word):
     except Exception as e:
         logger.exception(f"Failed to fetch data: {e}")
         return {"success": False, "error": str(e)}
+    finally:
+        await audioFile.close()
 
+    on_stage("group")
     words = [seg['text'].lower() for seg in data.get('segments', []) if seg.get('text')]
     
-    word_cluster_map = await loop.run_in_executor(None, cluster_words, words)
+    grouping = cluster_target_word if WORD_GROUPING == "target" else cluster_target_word_full
+    target_group = await loop.run_in_executor(None, grouping, words, target_word)
     
-    if target_word not in word_cluster_map:
+    if target_group is None:
         logger.error(f"'{target_word}' not found in dataset.")
         return {"success": False, "error": f"'{target_word}' not found in dataset."}
 
-    target_cluster = word_cluster_map[target_word]
     ipa_variants = [
         seg['ipa'] for seg in data.get('segments', [])
-        if seg.get('ipa') and word_cluster_map.get(seg['text'].lower()) == target_cluster
+        if seg.get('ipa') and seg['text'].lower() in target_group
     ]
 
     if not ipa_variants:
         logger.error(f"No IPA variants found for cluster containing '{target_word}'.")
         return {"success": False, "error": f"No IPA variants found for cluster containing '{target_word}'."}
 
+    on_stage("confusion")
     variant_counts = Counter(ipa_variants)
     ipa_list, freq_dict = format_output(variant_counts)
     
     confusion = await loop.run_in_executor(None, generate_confusion_matrix, ipa_list)
+    # Converting a large matrix to nested lists is slow too, so it also stays off the event loop.
+    confusion_rows = await loop.run_in_executor(None, rounded_rows, confusion)
     
     result = {
         "success": True,
@@ -117,9 +119,10 @@ async def analyze_audio_and_word(audioFile, target_word):
         ],
         "confusion_matrix": {
             "labels": ipa_list,
-            "matrix": confusion.values.tolist()
+            "matrix": confusion_rows
         },
     }
+    on_stage("save")
     results_path = "/app/tenents_data/backend_results.json"
     try:
         async with aiofiles.open(results_path, "w", encoding="utf-8") as f:
@@ -128,11 +131,10 @@ async def analyze_audio_and_word(audioFile, target_word):
         logger.error(f"Failed to write results to {results_path}: {e}")
     return result
 
-async def get_word_ipa(target_word):
+async def get_word_ipa(target_word, client):
     logger.info(f"Fetching IPA for word: {target_word}")
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.post(f"{VOXPREFERENCE_URL}/ipa", data={"word": target_word})
+        response = await post(client, "ipa", f"{VOXPREFERENCE_URL}/ipa", data={"word": target_word})
         if response.status_code != 200:
             logger.error(f"IPA API error {response.status_code}: {response.text}")
             return {"success": False, "ipa_error": f"IPA API error {response.status_code}: {response.text}"}
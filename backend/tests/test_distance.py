@@ -0,0 +1,77 @@
+"""complete_linkage_labels must agree with textbook complete linkage.
+
+Run from the backend directory:
+
+    python -m pytest tests
+
+The comparison against scipy is skipped when scipy is not installed; it is a
+test-only dependency.
+"""
+import numpy as np
+import pytest
+
+from distance import complete_linkage_labels
+
+
+def canonical(labels):
+    """Relabel so clusters are numbered in order of their first member."""
+    first_seen = {}
+    return [first_seen.setdefault(label, len(first_seen)) for label in labels]
+
+
+@pytest.mark.parametrize("seed", range(300))
+def test_matches_scipy_without_ties(seed):
+    hierarchy = pytest.importorskip("scipy.cluster.hierarchy")
+    from scipy.spatial.distance import squareform
+
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(2, 40))
+    # Continuous random distances, so no two pairs (or cluster maxima) tie.
+    upper = np.triu(rng.uniform(0, 10, size=(n, n)), k=1)
+    matrix = upper + upper.T
+    # Complete linkage never lowers merge heights, so stopping merges at a
+    # threshold that equals no distance cuts the same tree scipy builds.
+    threshold = rng.uniform(0, 10)
+
+    linkage = hierarchy.linkage(squareform(matrix, checks=False), method="complete")
+    expected = hierarchy.fcluster(linkage, t=threshold, criterion="distance")
+
+    assert list(complete_linkage_labels(matrix, threshold)) == canonical(expected)
+
+
+def test_ties_merge_the_earliest_pair_first():
+    # A chain 0-1-2-3 where every neighbouring pair is at distance 1 and every
+    # other pair at 3. Merging (0, 1) first leaves {0, 1} three away from 2, so
+    # (2, 3) merges next; merging (1, 2) first would strand 0 and 3 instead.
+    matrix = np.array([
+        [0, 1, 3, 3],
+        [1, 0, 1, 3],
+        [3, 1, 0, 1],
+        [3, 3, 1, 0],
+    ])
+
+    assert list(complete_linkage_labels(matrix, 2)) == [0, 0, 1, 1]
+
+
+def test_ties_follow_matrix_order():
+    # 1 is equally close to 0 and 2, and only one of them can join it.
+    matrix = np.array([
+        [0, 1, 2],
+        [1, 0, 1],
+        [2, 1, 0],
+    ])
+
+    assert list(complete_linkage_labels(matrix, 2)) == [0, 0, 1]
+    order = [2, 1, 0]
+    assert list(complete_linkage_labels(matrix[np.ix_(order, order)], 2)) == [0, 0, 1]
+
+
+def test_merges_stop_at_the_threshold():
+    matrix = np.array([
+        [0, 1, 2],
+        [1, 0, 2],
+        [2, 2, 0],
+    ])
+
+    assert list(complete_linkage_labels(matrix, 2)) == [0, 0, 1]
+    assert list(complete_linkage_labels(matrix, 2.5)) == [0, 0, 0]
@@ -1,15 +1,28 @@
 from fastapi import FastAPI, File, UploadFile, Request, Form
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-import io
-import librosa
-from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor
-from text_to_ipa import convert_to_ipa
-import torch
+from contextlib import asynccontextmanager
+from transformers import Wav2Vec2Processor
+from text_to_ipa import PHONEMIZER_KEY, convert_to_ipa, convert_words_to_ipa, get_backend_pool
+from batching import MicroBatcher
+from executor import BoundedExecutor, Overloaded, RequestTimings
+from metrics import metrics
+from result_cache import ResultCache, file_sha256
+from inference import MODEL_ID, INFERENCE_BACKEND, create_engine, load_config, load_model, warm_up
+from workers import INFERENCE_WORKERS, INFERENCE_WORKER_THREADS, WorkerPool
+from ctc import CTCStitcher, decode_words
+from streaming import iter_blocks, iter_windows, probe_duration, spool_upload
+from archive import AudioArchive
+from audio_io import load_audio
+from vad import TrimMap, iter_trimmed, trim_silence, vad_settings
+import asyncio
 import os
 import logging
 import sys
-from typing import List
+import json
+import threading
+import time
+from typing import List, Optional
 import numpy as np
 import re
 
@@ -26,8 +39,19 @@ logging.basicConfig(
 logger = logging.getLogger("voxpreference.app")
 
 logger.info("Starting Voxpreference FastAPI app...")
+PROCESS_STARTED = time.perf_counter()
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app):
+    # Load the model in the background so /health answers while weights are read.
+    threading.Thread(target=load_pipeline, name="model-loader", daemon=True).start()
+    yield
+    if worker_pool is not None:
+        worker_pool.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -37,10 +61,219 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-import os
-processor = Wav2Vec2Processor.from_pretrained("thebickersteth/wav2vec2-nigerian-english")
-model = Wav2Vec2ForCTC.from_pretrained("thebickersteth/wav2vec2-nigerian-english")
-# model.eval()
+# Request-path tuning
+INFERENCE_BATCH_SIZE = int(os.getenv("INFERENCE_BATCH_SIZE", "8"))
+# Unset: 10 ms for models that take an attention mask, 0 for the rest (see load_pipeline).
+INFERENCE_BATCH_WAIT_MS = os.getenv("INFERENCE_BATCH_WAIT_MS")
+CPU_WORKERS = int(os.getenv("CPU_WORKERS", str(os.cpu_count() or 1)))
+MAX_QUEUE_DEPTH = int(os.getenv("MAX_QUEUE_DEPTH", "32"))
+RESULT_CACHE_SIZE = int(os.getenv("RESULT_CACHE_SIZE", "512"))
+RESULT_CACHE_DISK = os.getenv("RESULT_CACHE_DISK", "0") == "1"
+RESULT_CACHE_DISK_ENTRIES = int(os.getenv("RESULT_CACHE_DISK_ENTRIES", "10000"))
+BULK_CONCURRENCY = int(os.getenv("BULK_CONCURRENCY", str(CPU_WORKERS)))
+BULK_SPOOL_MAX_MEMORY = int(os.getenv("BULK_SPOOL_MAX_MEMORY", str(1024 * 1024)))
+
+# Bounded executor for the CPU-bound request stages (decode, feature extraction, IPA)
+executor = BoundedExecutor(CPU_WORKERS, MAX_QUEUE_DEPTH)
+logger.info(f"CPU executor: workers={CPU_WORKERS}, queue_depth={MAX_QUEUE_DEPTH}")
+
+# Filled in by load_pipeline() on a background thread; `ready` is set once the
+# model is loaded and warmed up.
+processor = None
+model_config = None
+engine = None
+worker_pool = None
+batcher = None
+result_cache = None
+FRAME_DURATION = None
+ready = threading.Event()
+startup_error = None
+
+
+def load_pipeline():
+    """Load processor and model, build the engine (or worker pool), batcher and cache, and warm everything up."""
+    global processor, model_config, engine, worker_pool, batcher, result_cache, FRAME_DURATION, startup_error
+    try:
+        load_started = time.perf_counter()
+        processor = Wav2Vec2Processor.from_pretrained(MODEL_ID)
+
+        if INFERENCE_WORKERS > 0:
+            # Forward passes run in worker processes, and the first worker exports the
+            # memory-mappable weights; this process never loads them and keeps only
+            # the config, feature extractor and tokenizer.
+            worker_pool = WorkerPool(MODEL_ID, INFERENCE_BACKEND, INFERENCE_WORKERS, INFERENCE_WORKER_THREADS)
+            worker_pool.start()
+            model_config = load_config(MODEL_ID)
+            run_batch = worker_pool.forward_batch
+        else:
+            engine = create_engine(INFERENCE_BACKEND, load_model(MODEL_ID), processor)
+            model_config = engine.model.config
+            run_batch = engine.forward_batch
+        FRAME_DURATION = model_config.inputs_to_logits_ratio / 16000
+
+        # Without an attention mask, zero padding changes the other clips' logits (group norm
+        # and attention see the padding), so only equal-length clips may share a pass. Real
+        # uploads almost never have the same length, so waiting for more would only add latency.
+        uses_mask = bool(processor.feature_extractor.return_attention_mask)
+        batch_wait_ms = float(INFERENCE_BATCH_WAIT_MS) if INFERENCE_BATCH_WAIT_MS is not None else (10.0 if uses_mask else 0.0)
+        batcher = MicroBatcher(
+            run_batch,
+            max_batch_size=INFERENCE_BATCH_SIZE,
+            max_wait_ms=batch_wait_ms,
+            name="wav2vec2-batcher",
+            concurrency=max(1, INFERENCE_WORKERS),
+            batch_key=None if uses_mask else len
+        )
+        logger.info(f"Inference batching: max_batch_size={INFERENCE_BATCH_SIZE}, max_wait_ms={batch_wait_ms:g}, workers={INFERENCE_WORKERS}")
+        if not uses_mask:
+            logger.info("The model takes no attention mask: only clips of identical length are batched, so batching is effectively off.")
+
+        # Transcription results keyed by upload content and model revision
+        model_revision = os.getenv("MODEL_REVISION") or getattr(model_config, "_commit_hash", None) or "unknown"
+        result_cache = ResultCache(
+            RESULT_CACHE_SIZE,
+            namespace=f"{MODEL_ID}@{model_revision}:{INFERENCE_BACKEND}:{PHONEMIZER_KEY}:{vad_settings()}",
+            disk_dir=os.path.join(os.environ["HF_HOME"], "voxpreference", "results") if RESULT_CACHE_DISK else None,
+            max_disk_entries=RESULT_CACHE_DISK_ENTRIES
+        )
+        logger.info(f"Result cache: {RESULT_CACHE_SIZE} entries in memory, disk tier {'on' if RESULT_CACHE_DISK else 'off'}, revision {model_revision}")
+        metrics.set("model_load_s", round(time.perf_counter() - load_started, 3))
+
+        # Create the espeak backends once, up front, instead of on the first request.
+        try:
+            get_backend_pool()
+            convert_words_to_ipa(["ready"])
+            logger.info("espeak backend pool ready.")
+        except Exception as e:
+            logger.exception(f"Could not initialise the espeak backend pool: {e}")
+
+        # Pool workers warm themselves up before reporting ready.
+        warm_up_s = warm_up(engine) if engine is not None else 0.0
+        metrics.set("warm_up_s", round(warm_up_s, 3))
+        time_to_ready = time.perf_counter() - PROCESS_STARTED
+        metrics.set("time_to_ready_s", round(time_to_ready, 3))
+        ready.set()
+        logger.info(f"Ready: warm-up forward pass took {warm_up_s:.2f}s, time to ready {time_to_ready:.2f}s")
+    except Exception as e:
+        startup_error = str(e)
+        logger.exception(f"Model startup failed: {e}")
+
+
+def not_ready_response():
+    if startup_error:
+        return JSONResponse(status_code=503, content={"success": False, "error": f"Model failed to load: {startup_error}"})
+    return JSONResponse(
+        status_code=503,
+        content={"success": False, "error": "Model is still loading, retry later."},
+        headers={"Retry-After": "5"}
+    )
+
+# Chunked transcription of long recordings
+STREAM_CHUNK_S = float(os.getenv("STREAM_CHUNK_S", "20"))
+STREAM_STRIDE_S = float(os.getenv("STREAM_STRIDE_S", "2"))
+STREAM_THRESHOLD_S = float(os.getenv("STREAM_THRESHOLD_S", "60"))
+
+
+def build_segments(words):
+    """Attach IPA to timed words ([{"text", "start", "end"}]) to form response segments.
+
+    All distinct words are phonemized in one batched call.
+    """
+    ipa_results = convert_words_to_ipa([word["text"] for word in words])
+    segments = []
+    for word in words:
+        ipa_result = ipa_results.get(word["text"], {"success": True, "ipa": ""})
+        ipa = ipa_result["ipa"] if ipa_result["success"] else None
+        ipa_error = ipa_result["error"] if not ipa_result["success"] else None
+        segments.append({
+            "start": word["start"],
+            "end": word["end"],
+            "text": word["text"],
+            "ipa": ipa,
+            "ipa_error": ipa_error
+        })
+    return segments
+
+
+async def run_model(input_values, timings):
+    """Send one item through the micro-batcher and record its batching wait and forward time."""
+    future = batcher.submit(input_values)
+    logits = await asyncio.wrap_future(future)
+    timings.add("forward", future.started_at - future.submitted_at, future.finished_at - future.started_at)
+    return logits
+
+
+def overloaded_response(e):
+    logger.warning(f"Rejecting request, server saturated: {e}")
+    return JSONResponse(
+        status_code=503,
+        content={"success": False, "error": "Server is at capacity, retry later."},
+        headers={"Retry-After": "1"}
+    )
+
+
+def to_original_times(words, trim_map):
+    """Shift word timings from the silence-trimmed timeline back to the uploaded recording."""
+    return [
+        {**word, "start": round(trim_map.to_original(word["start"]), 2), "end": round(trim_map.to_original(word["end"]), 2)}
+        for word in words
+    ]
+
+
+def trim_audio(audio):
+    trim_map = TrimMap()
+    return trim_silence(audio, trim_map), trim_map
+
+
+def record_trim(trim_map):
+    """Publish how much audio voice-activity trimming kept away from the model."""
+    metrics.inc("vad_samples_total", trim_map.total_samples)
+    metrics.inc("vad_samples_dropped_total", trim_map.total_samples - trim_map.kept_samples)
+    logger.info(f"Voice-activity trimming dropped {trim_map.dropped_ratio:.1%} of samples")
+    return {"X-VAD-Dropped-Ratio": f"{trim_map.dropped_ratio:.3f}"}
+
+
+def ctc_decode(logits):
+    """Greedy CTC decoding: (transcription, timed words).
+
+    Word boundaries come from the CTC frame indices of the same forward pass.
+    """
+    predicted_ids = np.argmax(logits, axis=-1)
+    return processor.decode(predicted_ids), decode_words(processor.tokenizer, predicted_ids, 0, FRAME_DURATION)
+
+
+def stitch_window(stitcher, logits, window):
+    """Greedy-decode the kept part of a window's logits and return the words it finished."""
+    predicted_ids = np.argmax(logits, axis=-1)
+    ratio = model_config.inputs_to_logits_ratio
+    lo = round((window.keep_start - window.start) / ratio)
+    hi = min(len(predicted_ids), round((window.keep_end - window.start) / ratio))
+    return stitcher.push(predicted_ids[lo:hi], round(window.keep_start / ratio))
+
+
+async def transcribe_chunked(fileobj, timings, trim_map):
+    """Transcribe an audio file window by window, yielding (segments, seconds_decoded) as words finish.
+
+    Audio is read, resampled and silence-trimmed incrementally, so memory stays
+    bounded by the window size regardless of recording length. Timings refer to
+    the original recording.
+    """
+    blocks = iter_trimmed(iter_blocks(fileobj), trim_map)
+    windows = iter_windows(blocks, chunk_s=STREAM_CHUNK_S, stride_s=STREAM_STRIDE_S)
+    stitcher = CTCStitcher(processor.tokenizer, FRAME_DURATION)
+    seconds_decoded = 0.0
+    while True:
+        window = await executor.run(timings, "decode", next, windows, None)
+        if window is None:
+            break
+        inputs = await executor.run(timings, "features", processor, window.samples, sampling_rate=16000)
+        logits = await run_model(inputs.input_values[0], timings)
+        words = to_original_times(await executor.run(timings, "ctc", stitch_window, stitcher, logits, window), trim_map)
+        seconds_decoded = trim_map.to_original(window.end / 16000)
+        logger.debug(f"Decoded window ending at {seconds_decoded:.2f}s, {len(words)} word(s) finished.")
+        yield await executor.run(timings, "ipa", build_segments, words), seconds_decoded
+    words = to_original_times(stitcher.flush(), trim_map)
+    yield await executor.run(timings, "ipa", build_segments, words), trim_map.total_samples / 16000
 
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
@@ -64,49 +297,112 @@ def health():
     logger.info("Health check endpoint called.")
     return {"status": "ok"} 
 
+@app.get("/ready")
+def readiness():
+    """200 once the model is loaded and warmed up, 503 before that, if loading failed, or while no worker is up."""
+    if ready.is_set() and worker_pool is not None and worker_pool.ready_count() == 0:
+        # Every inference worker died and is waiting to be restarted; see WorkerPool.
+        return JSONResponse(
+            status_code=503,
+            content={"status": "degraded", "error": "No inference worker is ready", "workers": worker_pool.stats()},
+            headers={"Retry-After": "5"}
+        )
+    if ready.is_set():
+        return {"status": "ready", "time_to_ready_s": metrics.snapshot()["gauges"].get("time_to_ready_s")}
+    if startup_error:
+        return JSONResponse(status_code=503, content={"status": "failed", "error": startup_error})
+    return JSONResponse(status_code=503, content={"status": "loading"})
+
+@app.get("/metrics")
+def get_metrics():
+    """Counters, gauges and latency summaries for autoscaling and dashboards."""
+    snapshot = metrics.snapshot()
+    snapshot["gauges"]["executor_capacity"] = executor.capacity
+    snapshot["gauges"]["ready"] = ready.is_set()
+    vad_total = snapshot["counters"].get("vad_samples_total", 0)
+    if vad_total:
+        snapshot["gauges"]["vad_dropped_ratio"] = round(snapshot["counters"].get("vad_samples_dropped_total", 0) / vad_total, 3)
+    if result_cache is not None:
+        snapshot["gauges"]["result_cache_entries"] = len(result_cache)
+    if worker_pool is not None:
+        snapshot["inference_workers"] = worker_pool.stats()
+    return snapshot
+
+def cache_lookup(fileobj):
+    """Hash an upload and return (cache key, cached response content or None)."""
+    key = result_cache.key(file_sha256(fileobj))
+    return key, result_cache.get(key)
+
+def cache_store(key, result):
+    """Cache a result unless IPA conversion failed for any segment (e.g. espeak was down), so it gets retried."""
+    if any(segment.get("ipa_error") for segment in result["segments"]):
+        metrics.inc("result_cache_skipped_total")
+        return
+    result_cache.put(key, result)
+
+async def transcribe_file(fileobj, timings):
+    """Transcribe a seekable audio file; returns (result, trim_map).
+
+    Recordings longer than STREAM_THRESHOLD_S go through the chunked path.
+    """
+    probed_duration = await executor.run(timings, "probe", probe_duration, fileobj)
+    if probed_duration is not None and probed_duration > STREAM_THRESHOLD_S:
+        logger.info(f"Upload is {probed_duration:.1f}s long; using chunked transcription.")
+        segments = []
+        duration = 0.0
+        trim_map = TrimMap()
+        async for window_segments, duration in transcribe_chunked(fileobj, timings, trim_map):
+            segments.extend(window_segments)
+        transcription = " ".join(segment["text"] for segment in segments)
+    else:
+        audio_input, sr = await executor.run(timings, "decode", load_audio, fileobj)
+        logger.debug("Audio loaded and resampled to 16kHz.")
+        duration = len(audio_input) / sr
+        audio_input, trim_map = await executor.run(timings, "vad", trim_audio, audio_input)
+        inputs = await executor.run(timings, "features", processor, audio_input, sampling_rate=16000)
+        logger.debug("Audio processed for model input.")
+        logits = await run_model(inputs.input_values[0], timings)
+        transcription, timed_words = await executor.run(timings, "ctc", ctc_decode, logits)
+        timed_words = to_original_times(timed_words, trim_map)
+        segments = await executor.run(timings, "ipa", build_segments, timed_words)
+    result = {
+        "segments": segments,
+        "transcription": transcription,
+        "duration": duration
+    }
+    return result, trim_map
+
 @app.post("/")
 async def transcribe(audioFile: UploadFile = File(...)):
     logger.info(f"Transcription endpoint called. Filename: {audioFile.filename}")
+    if not ready.is_set():
+        return not_ready_response()
     try:
-        audio_bytes = await audioFile.read()
-        logger.debug(f"Read {len(audio_bytes)} bytes from uploaded file.")
-        audio_input, sr = librosa.load(io.BytesIO(audio_bytes), sr=16000)
-        logger.debug("Audio loaded and resampled to 16kHz.")
-        duration = len(audio_input) / sr
-        inputs = processor(audio_input, sampling_rate=16000, return_tensors="pt")
-        logger.debug("Audio processed for model input.")
-        with torch.no_grad():
-            logits = model(inputs.input_values).logits
-            predicted_ids = torch.argmax(logits, dim=-1)
-        transcription = processor.batch_decode(predicted_ids.numpy())[0]
-        logger.info(f"Transcription result: {transcription}")
-        words = transcription.strip().split()
-        n_words = len(words)
-        segments = []
-        if n_words > 0:
-            word_duration = duration / n_words
-            for i, word in enumerate(words):
-                start = round(i * word_duration, 2)
-                end = round((i + 1) * word_duration, 2)
-                ipa_result = convert_to_ipa(word)
-                ipa = ipa_result["ipa"] if ipa_result["success"] else None
-                ipa_error = ipa_result["error"] if not ipa_result["success"] else None
-                segments.append({
-                    "start": start,
-                    "end": end,
-                    "text": word,
-                    "ipa": ipa,
-                    "ipa_error": ipa_error
-                })
-        logger.info(f"Final result: {segments, transcription, duration}")
+        executor.acquire()
+    except Overloaded as e:
+        return overloaded_response(e)
+    timings = RequestTimings()
+    try:
+        cache_key, cached = await executor.run(timings, "cache", cache_lookup, audioFile.file)
+        if cached is not None:
+            metrics.inc("result_cache_hits_total")
+            logger.info(f"Result cache hit for {audioFile.filename}")
+            return JSONResponse(
+                status_code=200,
+                content={"success": True, **cached},
+                headers={**timings.headers(), "X-Cache": "hit"}
+            )
+        metrics.inc("result_cache_misses_total")
+        result, trim_map = await transcribe_file(audioFile.file, timings)
+        logger.info(f"Transcription result: {result['transcription']}")
+        logger.info(f"Final result: {result['segments'], result['transcription'], result['duration']}")
+        logger.info(f"Timings: {timings.as_dict()}")
+        vad_headers = record_trim(trim_map)
+        await executor.run(timings, "cache", cache_store, cache_key, result)
         return JSONResponse(
             status_code=200,
-            content={
-                "success": True,
-                "segments": segments,
-                "transcription": transcription,
-                "duration": duration
-            }
+            content={"success": True, **result},
+            headers={**timings.headers(), **vad_headers, "X-Cache": "miss"}
         )
     except Exception as e:
         logger.exception(f"Error during transcription process: {e}")
@@ -114,12 +410,173 @@ async def transcribe(audioFile: UploadFile = File(...)):
             status_code=500,
             content={"success": False, "error": str(e)}
         )
+    finally:
+        timings.finish()
+        executor.release()
+
+async def transcribe_clip(name, open_clip):
+    """Transcribe one clip of a bulk request; errors are reported in the result, never raised.
+
+    Each clip is admitted to the executor on its own, like a single-file
+    request, so a bulk request never has more stages in flight than slots it
+    holds. When the server is saturated the clip waits for a slot rather than
+    failing.
+    """
+    await executor.acquire_wait()
+    timings = RequestTimings()
+    fileobj = None
+    try:
+        fileobj = await executor.run(timings, "read", open_clip)
+        cache_key, cached = await executor.run(timings, "cache", cache_lookup, fileobj)
+        if cached is not None:
+            metrics.inc("result_cache_hits_total")
+            return {"file": name, "success": True, **cached}
+        metrics.inc("result_cache_misses_total")
+        result, trim_map = await transcribe_file(fileobj, timings)
+        record_trim(trim_map)
+        await executor.run(timings, "cache", cache_store, cache_key, result)
+        return {"file": name, "success": True, **result, "timings": timings.as_dict()}
+    except Exception as e:
+        logger.exception(f"Error transcribing {name} in bulk request: {e}")
+        return {"file": name, "success": False, "error": str(e)}
+    finally:
+        if fileobj is not None:
+            fileobj.close()
+        timings.finish()
+        executor.release()
+
+@app.post("/bulk")
+async def transcribe_bulk(
+    audioFiles: Optional[List[UploadFile]] = File(None),
+    archive: Optional[UploadFile] = File(None)
+):
+    """Transcribe many clips in one request, given as repeated `audioFiles` fields
+    and/or a zip/tar `archive`. Clips are transcribed in parallel, up to
+    BULK_CONCURRENCY at a time; one NDJSON line is streamed per clip as soon as it finishes (in
+    completion order), followed by a summary line."""
+    logger.info(f"Bulk transcription endpoint called with {len(audioFiles or [])} file(s), archive={archive.filename if archive else None}")
+    if not ready.is_set():
+        return not_ready_response()
+    if not audioFiles and archive is None:
+        return JSONResponse(status_code=400, content={"success": False, "error": "Send audioFiles and/or an archive."})
+    try:
+        executor.acquire()
+    except Overloaded as e:
+        return overloaded_response(e)
+
+    # Uploads are closed once the endpoint returns, so bodies are moved to spool
+    # files owned by the response generator.
+    timings = RequestTimings()
+    clips = []
+    spools = []
+    audio_archive = None
+    try:
+        for upload in audioFiles or []:
+            spool = await executor.run(timings, "spool", spool_upload, upload.file, BULK_SPOOL_MAX_MEMORY)
+            spools.append(spool)
+            clips.append((upload.filename, lambda spool=spool: spool))
+        if archive is not None:
+            spool = await executor.run(timings, "spool", spool_upload, archive.file, BULK_SPOOL_MAX_MEMORY)
+            spools.append(spool)
+            audio_archive = await executor.run(timings, "archive", AudioArchive, spool)
+            clips.extend((name, lambda name=name: audio_archive.open(name)) for name in audio_archive.names)
+    except Exception as e:
+        logger.exception(f"Could not read bulk upload: {e}")
+        for spool in spools:
+            spool.close()
+        return JSONResponse(status_code=400, content={"success": False, "error": str(e)})
+    finally:
+        # The request's own slot only covers spooling; each clip is admitted separately.
+        executor.release()
+
+    async def ndjson():
+        limit = asyncio.Semaphore(BULK_CONCURRENCY)
+
+        async def run(name, open_clip):
+            async with limit:
+                return await transcribe_clip(name, open_clip)
+
+        tasks = [asyncio.create_task(run(name, open_clip)) for name, open_clip in clips]
+        failed = 0
+        try:
+            for task in asyncio.as_completed(tasks):
+                line = await task
+                failed += not line["success"]
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+            logger.info(f"Bulk transcription finished: {len(clips)} clip(s), {failed} failed")
+            yield json.dumps({"done": True, "files": len(clips), "failed": failed}) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+            # Wait until no clip is still reading the archive or spools before closing them.
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if audio_archive is not None:
+                audio_archive.close()
+            for spool in spools:
+                spool.close()
+            timings.finish()
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+@app.post("/stream")
+async def transcribe_stream(audioFile: UploadFile = File(...)):
+    """Chunked transcription streamed back as NDJSON: one line per batch of finished
+    segments, then a final line with the full transcription, duration and timings."""
+    logger.info(f"Streaming transcription endpoint called. Filename: {audioFile.filename}")
+    if not ready.is_set():
+        return not_ready_response()
+    try:
+        executor.acquire()
+    except Overloaded as e:
+        return overloaded_response(e)
+    timings = RequestTimings()
+    try:
+        # The upload is closed once the endpoint returns, so the body is moved to a
+        # spool file owned by the response generator.
+        spool = await executor.run(timings, "spool", spool_upload, audioFile.file)
+    except Exception:
+        executor.release()
+        raise
+
+    async def ndjson():
+        words = []
+        duration = 0.0
+        trim_map = TrimMap()
+        try:
+            async for segments, duration in transcribe_chunked(spool, timings, trim_map):
+                if segments:
+                    words.extend(segment["text"] for segment in segments)
+                    yield json.dumps({"segments": segments}, ensure_ascii=False) + "\n"
+            transcription = " ".join(words)
+            logger.info(f"Streaming transcription finished: {transcription}")
+            record_trim(trim_map)
+            yield json.dumps({
+                "success": True,
+                "transcription": transcription,
+                "duration": duration,
+                "timings": timings.as_dict(),
+                "vad_dropped_ratio": round(trim_map.dropped_ratio, 3)
+            }, ensure_ascii=False) + "\n"
+        except Exception as e:
+            logger.exception(f"Error during streaming transcription: {e}")
+            yield json.dumps({"success": False, "error": str(e)}) + "\n"
+        finally:
+            spool.close()
+            timings.finish()
+            executor.release()
+
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
 
 @app.post("/ipa")
 async def word_to_ipa(word: str = Form(...)):
     logger.info(f"IPA endpoint called for word: {word}")
     try:
-        ipa_result = convert_to_ipa(word)
+        executor.acquire()
+    except Overloaded as e:
+        return overloaded_response(e)
+    timings = RequestTimings()
+    try:
+        ipa_result = await executor.run(timings, "ipa", convert_to_ipa, word)
         ipa = ipa_result["ipa"] if ipa_result["success"] else None
         ipa_error = ipa_result["error"] if not ipa_result["success"] else None
         return JSONResponse(
@@ -128,7 +585,8 @@ async def word_to_ipa(word: str = Form(...)):
                 "success": ipa_result["success"],
                 "ipa": ipa,
                 "ipa_error": ipa_error
-            }
+            },
+            headers=timings.headers()
         )
     except Exception as e:
         logger.exception(f"Error during IPA conversion: {e}")
@@ -136,3 +594,6 @@ async def word_to_ipa(word: str = Form(...)):
             status_code=500,
             content={"success": False, "error": str(e)}
         )
+    finally:
+        timings.finish()
+        executor.release()
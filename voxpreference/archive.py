@@ -0,0 +1,48 @@
+import io
+import tarfile
+import threading
+import zipfile
+
+AUDIO_EXTENSIONS = (".wav", ".flac", ".mp3", ".ogg", ".m4a")
+
+
+class AudioArchive:
+    """Read-only view of the audio members of a zip or tar archive.
+
+    Members are read one at a time on demand (under a lock, since the archive
+    shares one file object), so only the clips currently being processed are
+    held in memory.
+    """
+
+    def __init__(self, fileobj):
+        self._lock = threading.Lock()
+        fileobj.seek(0)
+        if zipfile.is_zipfile(fileobj):
+            fileobj.seek(0)
+            self._zip = zipfile.ZipFile(fileobj)
+            self._tar = None
+            self.names = [info.filename for info in self._zip.infolist() if not info.is_dir()]
+        else:
+            fileobj.seek(0)
+            try:
+                self._tar = tarfile.open(fileobj=fileobj, mode="r:*")
+            except tarfile.TarError:
+                raise ValueError("Archive is neither a zip nor a tar file.")
+            self._zip = None
+            self._members = {member.name: member for member in self._tar.getmembers() if member.isfile()}
+            self.names = list(self._members)
+        self.names = [
+            name for name in self.names
+            if name.lower().endswith(AUDIO_EXTENSIONS) and not name.rsplit("/", 1)[-1].startswith(".")
+        ]
+
+    def open(self, name):
+        """Return the member's bytes as an in-memory file."""
+        with self._lock:
+            if self._zip is not None:
+                return io.BytesIO(self._zip.read(name))
+            return io.BytesIO(self._tar.extractfile(self._members[name]).read())
+
+    def close(self):
+        with self._lock:
+            (self._zip or self._tar).close()
@@ -0,0 +1,53 @@
+import logging
+
+import librosa
+import numpy as np
+import soundfile as sf
+import soxr
+
+logger = logging.getLogger("voxpreference.audio_io")
+
+SAMPLING_RATE = 16000
+# libsoxr quality preset; "HQ" is what librosa's default res_type ("soxr_hq") uses.
+RESAMPLE_QUALITY = "HQ"
+
+
+def resample(audio, orig_sr, target_sr=SAMPLING_RATE):
+    """libsoxr resampling to target_sr; returns the input untouched if no resampling is needed."""
+    if orig_sr == target_sr:
+        return audio
+    return soxr.resample(np.ascontiguousarray(audio, dtype=np.float32), orig_sr, target_sr, quality=RESAMPLE_QUALITY)
+
+
+def resample_stream(orig_sr, target_sr=SAMPLING_RATE):
+    """A stateful mono resampler for audio fed in consecutive chunks (see soxr.ResampleStream)."""
+    return soxr.ResampleStream(orig_sr, target_sr, 1, dtype="float32", quality=RESAMPLE_QUALITY)
+
+
+def to_mono(audio):
+    """Downmix (frames, channels) audio; single-channel input is returned as a view, not a copy."""
+    if audio.ndim == 1:
+        return audio
+    if audio.shape[1] == 1:
+        return audio[:, 0]
+    return audio.mean(axis=1, dtype=np.float32)
+
+
+def load_audio(fileobj):
+    """Decode an audio file to mono float32 at 16 kHz; returns (audio, 16000).
+
+    The header is read first: libsndfile decodes straight into a float32
+    buffer, 16 kHz input skips resampling entirely and other rates go through
+    libsoxr. Formats libsndfile cannot read fall back to librosa.
+    """
+    fileobj.seek(0)
+    try:
+        with sf.SoundFile(fileobj) as f:
+            sr = f.samplerate
+            audio = f.read(dtype="float32", always_2d=False)
+    except RuntimeError as e:
+        logger.debug(f"libsndfile cannot decode this upload ({e}); falling back to librosa.")
+        fileobj.seek(0)
+        audio, _ = librosa.load(fileobj, sr=SAMPLING_RATE)
+        return audio, SAMPLING_RATE
+    return resample(to_mono(audio), sr), SAMPLING_RATE
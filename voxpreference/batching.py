@@ -0,0 +1,115 @@
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+logger = logging.getLogger("voxpreference.batching")
+
+
+class MicroBatcher:
+    """Groups concurrent single-item requests into batches for one call of `run_batch`.
+
+    Items are collected until `max_batch_size` is reached or `max_wait_ms` has
+    passed since the first item of the batch arrived. `run_batch` receives the
+    list of items and must return one result per item, in the same order.
+
+    Returned futures carry `submitted_at`, `started_at` and `finished_at`
+    (time.perf_counter values) so callers can split queue wait from run time.
+
+    With `concurrency` > 1, that many batches can run at once (e.g. one per
+    inference worker process); each runner thread collects its own batch.
+
+    With a `batch_key`, only items with equal keys share a batch. Items that
+    arrive while a batch with another key is being collected are held back and
+    start the next batch, in arrival order.
+    """
+
+    def __init__(self, run_batch, max_batch_size=8, max_wait_ms=10, name="micro-batcher", concurrency=1, batch_key=None):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.batch_key = batch_key
+        self._queue = queue.Queue()
+        self._held = deque()
+        self._held_lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._loop, name=f"{name}-{i}", daemon=True)
+            for i in range(max(1, int(concurrency)))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, item):
+        """Queue an item and return a concurrent.futures.Future for its result."""
+        future = Future()
+        future.submitted_at = time.perf_counter()
+        self._queue.put((item, future))
+        return future
+
+    def _collect(self):
+        batch = self._take_held() if self.batch_key is not None else []
+        if not batch:
+            batch = [self._queue.get()]
+        key = self.batch_key(batch[0][0]) if self.batch_key is not None else None
+        held = []
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                entry = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if self.batch_key is None or self.batch_key(entry[0]) == key:
+                batch.append(entry)
+            else:
+                held.append(entry)
+        if held:
+            with self._held_lock:
+                self._held.extend(held)
+        return batch
+
+    def _take_held(self):
+        """The oldest held-back item plus any other held items with the same key."""
+        with self._held_lock:
+            if not self._held:
+                return []
+            first = self._held.popleft()
+            key = self.batch_key(first[0])
+            batch, rest = [first], deque()
+            for entry in self._held:
+                if len(batch) < self.max_batch_size and self.batch_key(entry[0]) == key:
+                    batch.append(entry)
+                else:
+                    rest.append(entry)
+            self._held = rest
+            return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            # Drop requests whose caller already gave up (e.g. client disconnected).
+            batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            items = [item for item, _ in batch]
+            logger.debug(f"Running batch of {len(items)} item(s)")
+            started = time.perf_counter()
+            for _, future in batch:
+                future.started_at = started
+            try:
+                results = self.run_batch(items)
+            except Exception as e:
+                logger.exception(f"Batch of {len(items)} item(s) failed: {e}")
+                finished = time.perf_counter()
+                for _, future in batch:
+                    future.finished_at = finished
+                    future.set_exception(e)
+                continue
+            finished = time.perf_counter()
+            for (_, future), result in zip(batch, results):
+                future.finished_at = finished
+                future.set_result(result)
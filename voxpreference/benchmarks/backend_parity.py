@@ -0,0 +1,91 @@
+"""Transcript parity and real-time factor across inference backends.
+
+Every clip in the fixture set is transcribed with greedy CTC decoding by each
+backend. Transcripts are compared with the first backend (eager by default),
+and each backend's real-time factor is reported as compute seconds per second
+of audio (lower is better).
+
+Run from the voxpreference directory:
+
+    python -m benchmarks.backend_parity --fixtures path/to/wavs
+    python -m benchmarks.backend_parity --manifest data/val.csv --limit 50 --backends eager int8 onnx
+
+Exits with status 1 if more than --max-mismatches transcripts differ from the
+reference backend.
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+
+import librosa
+import pandas as pd
+from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor
+
+from inference import ENGINES, MODEL_ID, create_engine
+
+
+def load_fixtures(args):
+    if args.fixtures:
+        paths = sorted(
+            path for path in glob.glob(os.path.join(args.fixtures, "*"))
+            if path.lower().endswith((".wav", ".flac", ".mp3", ".ogg"))
+        )
+    else:
+        paths = pd.read_csv(args.manifest)["path"].tolist()
+    paths = paths[:args.limit] if args.limit else paths
+    if not paths:
+        raise SystemExit("No fixture audio found.")
+    return [(path, librosa.load(path, sr=16000)[0]) for path in paths]
+
+
+def run_backend(name, processor, fixtures):
+    # Each backend gets a fresh model: int8 quantizes in place.
+    engine = create_engine(name, Wav2Vec2ForCTC.from_pretrained(MODEL_ID), processor)
+    engine.forward_batch([processor(fixtures[0][1], sampling_rate=16000).input_values[0]])  # warm-up
+    transcripts = []
+    compute_s = 0.0
+    for _, audio in fixtures:
+        start = time.perf_counter()
+        inputs = processor(audio, sampling_rate=16000)
+        logits = engine.forward_batch([inputs.input_values[0]])[0]
+        transcripts.append(processor.decode(logits.argmax(axis=-1)))
+        compute_s += time.perf_counter() - start
+    return transcripts, compute_s
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare inference backends on a fixture set")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--fixtures", help="directory of audio clips")
+    source.add_argument("--manifest", default="data/val.csv", help="CSV with a `path` column")
+    parser.add_argument("--limit", type=int, default=20, help="number of clips (0 for all)")
+    parser.add_argument("--backends", nargs="+", default=list(ENGINES), choices=list(ENGINES))
+    parser.add_argument("--max-mismatches", type=int, default=0)
+    args = parser.parse_args()
+
+    fixtures = load_fixtures(args)
+    audio_s = sum(len(audio) for _, audio in fixtures) / 16000
+    processor = Wav2Vec2Processor.from_pretrained(MODEL_ID)
+    print(f"{len(fixtures)} clips, {audio_s:.1f}s of audio, model {MODEL_ID}")
+
+    reference_name = args.backends[0]
+    reference = None
+    failed = False
+    for name in args.backends:
+        transcripts, compute_s = run_backend(name, processor, fixtures)
+        if reference is None:
+            reference = transcripts
+        mismatches = [
+            (path, ref, hyp) for (path, _), ref, hyp in zip(fixtures, reference, transcripts) if ref != hyp
+        ]
+        print(f"{name:<6} RTF {compute_s / audio_s:.3f}   {len(mismatches)}/{len(fixtures)} transcripts differ from {reference_name}")
+        for path, ref, hyp in mismatches:
+            print(f"    {path}\n      {reference_name}: {ref}\n      {name}: {hyp}")
+        failed = failed or len(mismatches) > args.max_mismatches
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+"""End-to-end performance benchmark for the transcription service.
+
+Drives the FastAPI app in-process (httpx ASGI transport, no network) with
+synthetic audio of several lengths at several concurrency levels, and reports
+per scenario:
+
+- client latency p50 / p95 / p99
+- real-time factor (latency / audio duration, median)
+- throughput in audio seconds per wall-clock second
+- peak RSS of the process and peak proportional set size (PSS) of the app
+  plus its inference worker processes, sampled from /proc during the
+  scenario, and the PSS of each at its end; PSS splits pages shared between
+  processes (e.g. memory-mapped weights) among them, so the total is what
+  the service really costs
+- mean time per request in each pipeline stage (decode, vad, features,
+  forward, ctc, ipa, ...), taken from the app's own stage metrics
+
+Results are written as JSON so runs on different commits can be compared:
+
+    python -m benchmarks.bench_app --tiny-model --out bench_tiny.json
+    python -m benchmarks.bench_app --tiny-model --compare bench_tiny.json
+
+`--tiny-model` builds a small randomly initialised Wav2Vec2 model in a temp
+directory, so the harness runs fully offline. Otherwise MODEL_ID (or --model)
+must be available locally. Needs httpx; IPA conversion needs espeak.
+
+Run from the voxpreference directory.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+import soundfile as sf
+
+LETTERS = "abcdefghijklmnopqrstuvwxyz'"
+
+
+def build_tiny_model(directory):
+    """Save a tiny random-weight Wav2Vec2 CTC model and processor to `directory`."""
+    from transformers import (
+        Wav2Vec2Config,
+        Wav2Vec2CTCTokenizer,
+        Wav2Vec2FeatureExtractor,
+        Wav2Vec2ForCTC,
+        Wav2Vec2Processor,
+    )
+
+    vocab = {"<pad>": 0, "<s>": 1, "</s>": 2, "<unk>": 3, "|": 4}
+    vocab.update({letter: i + 5 for i, letter in enumerate(LETTERS)})
+    vocab_path = os.path.join(directory, "vocab.json")
+    with open(vocab_path, "w") as f:
+        json.dump(vocab, f)
+    tokenizer = Wav2Vec2CTCTokenizer(vocab_path, unk_token="<unk>", pad_token="<pad>", word_delimiter_token="|")
+    feature_extractor = Wav2Vec2FeatureExtractor(
+        feature_size=1, sampling_rate=16000, padding_value=0.0, do_normalize=True, return_attention_mask=False
+    )
+    Wav2Vec2Processor(feature_extractor=feature_extractor, tokenizer=tokenizer).save_pretrained(directory)
+    config = Wav2Vec2Config(
+        vocab_size=len(vocab),
+        hidden_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=2,
+        intermediate_size=128,
+        conv_dim=(64,) * 7,
+        num_conv_pos_embeddings=16,
+        num_conv_pos_embedding_groups=4,
+        pad_token_id=0,
+    )
+    Wav2Vec2ForCTC(config).save_pretrained(directory)
+    return directory
+
+
+def synthetic_clip(seconds, seed):
+    """WAV bytes of a speech-like signal: bursts of harmonics separated by short pauses."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * 16000)) / 16000
+    pitch = 120 + 60 * rng.random()
+    voiced = sum(np.sin(2 * np.pi * pitch * k * t) / k for k in range(1, 6))
+    envelope = (np.sin(2 * np.pi * 2.5 * t + rng.random() * 6) > -0.3).astype(np.float32)
+    audio = (0.2 * voiced * envelope + 0.005 * rng.standard_normal(len(t))).astype(np.float32)
+    buffer = io.BytesIO()
+    sf.write(buffer, audio, 16000, format="WAV", subtype="PCM_16")
+    return buffer.getvalue()
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q / 100))]
+
+
+def stage_means(before, after, requests):
+    """Mean ms per request spent in each stage between two metrics snapshots."""
+    stages = {}
+    for name, timing in after["timings"].items():
+        if not (name.startswith("stage_") and name.endswith("_exec")):
+            continue
+        spent = timing["sum_s"] - before["timings"].get(name, {}).get("sum_s", 0.0)
+        stages[name[len("stage_"):-len("_exec")]] = round(spent * 1000 / requests, 2)
+    return stages
+
+
+def proc_status_kb(pid, field, path="smaps_rollup"):
+    """A kB value from /proc/<pid>/<path> (e.g. "Pss" from smaps_rollup, "VmRSS" from status); 0 if unavailable."""
+    try:
+        with open(f"/proc/{pid}/{path}") as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+def descendants(pid):
+    """Pids of every process below `pid` (children started by any of its threads, recursively)."""
+    found = []
+    try:
+        tasks = os.listdir(f"/proc/{pid}/task")
+    except OSError:
+        return found
+    for task in tasks:
+        try:
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children = [int(child) for child in f.read().split()]
+        except OSError:
+            continue
+        for child in children:
+            found += [child] + descendants(child)
+    return found
+
+
+def pss_mb():
+    """PSS of this process and, summed, of all its child processes (the inference workers), in MB."""
+    app_kb = proc_status_kb(os.getpid(), "Pss")
+    workers_kb = sum(proc_status_kb(pid, "Pss") for pid in descendants(os.getpid()))
+    return {
+        "app_pss_mb": round(app_kb / 1024, 1),
+        "workers_pss_mb": round(workers_kb / 1024, 1),
+        "total_pss_mb": round((app_kb + workers_kb) / 1024, 1),
+    }
+
+
+class MemorySampler:
+    """Peak VmRSS of this process and peak total PSS with its children, sampled while in the `with` block.
+
+    ru_maxrss is a high-water mark for the whole process lifetime, so it would
+    repeat the largest earlier scenario; sampling gives each scenario its own peak.
+    """
+
+    def __init__(self, interval_s=0.1):
+        self.interval_s = interval_s
+        self.peak_rss_kb = 0
+        self.peak_pss_kb = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="memory-sampler", daemon=True)
+
+    def sample(self):
+        pid = os.getpid()
+        self.peak_rss_kb = max(self.peak_rss_kb, proc_status_kb(pid, "VmRSS", "status"))
+        self.peak_pss_kb = max(self.peak_pss_kb, sum(proc_status_kb(p, "Pss") for p in [pid] + descendants(pid)))
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            self.sample()
+
+    def __enter__(self):
+        self.sample()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
+
+
+async def run_scenario(client, metrics, seconds, concurrency, requests):
+    # Lengths differ by a few ms, as real uploads do, so identical-length batching doesn't flatter the numbers.
+    clips = [synthetic_clip(seconds + 0.005 * seed, seed) for seed in range(min(requests, 8))]
+    latencies = []
+    failures = 0
+    next_request = iter(range(requests))
+
+    async def worker():
+        nonlocal failures
+        for i in next_request:
+            files = {"audioFile": (f"clip{i}.wav", clips[i % len(clips)], "audio/wav")}
+            start = time.perf_counter()
+            response = await client.post("/", files=files)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code != 200:
+                failures += 1
+
+    before = metrics.snapshot()
+    wall_start = time.perf_counter()
+    with MemorySampler() as memory:
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - wall_start
+    after = metrics.snapshot()
+    return {
+        "audio_s": seconds,
+        "concurrency": concurrency,
+        "requests": requests,
+        "failures": failures,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "rtf": round(statistics.median(latencies) / seconds, 4),
+        "throughput_audio_s_per_s": round(seconds * requests / wall, 2),
+        "peak_rss_mb": round(memory.peak_rss_kb / 1024, 1),
+        "peak_total_pss_mb": round(memory.peak_pss_kb / 1024, 1),
+        **pss_mb(),
+        "stage_ms": stage_means(before, after, requests),
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def print_comparison(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {(r["audio_s"], r["concurrency"]): r for r in baseline["scenarios"]}
+    print(f"\nCompared with {baseline_path} (revision {baseline.get('revision')}):")
+    for result in results:
+        old = previous.get((result["audio_s"], result["concurrency"]))
+        if old is None:
+            continue
+        deltas = "  ".join(
+            f"{key} {(result[key] - old[key]) / old[key]:+.1%}"
+            for key in ("p50_ms", "p95_ms", "rtf", "peak_rss_mb", "peak_total_pss_mb") if old.get(key)
+        )
+        print(f"  {result['audio_s']:>6g}s x{result['concurrency']:<3} {deltas}")
+
+
+async def main_async(args):
+    import httpx
+
+    sys.path.insert(0, os.getcwd())
+    import app as vox_app
+
+    transport = httpx.ASGITransport(app=vox_app.app)
+    async with vox_app.app.router.lifespan_context(vox_app.app):
+        started = time.perf_counter()
+        while not vox_app.ready.is_set():
+            if vox_app.startup_error:
+                raise SystemExit(f"Model failed to load: {vox_app.startup_error}")
+            await asyncio.sleep(0.1)
+        print(f"App ready after {time.perf_counter() - started:.1f}s")
+
+        results = []
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+            for seconds in args.durations:
+                for concurrency in args.concurrency:
+                    requests = max(args.requests, concurrency)
+                    result = await run_scenario(client, vox_app.metrics, seconds, concurrency, requests)
+                    results.append(result)
+                    print(
+                        f"{seconds:>6g}s x{concurrency:<3} p50 {result['p50_ms']:>9.1f} ms  p95 {result['p95_ms']:>9.1f} ms  "
+                        f"p99 {result['p99_ms']:>9.1f} ms  RTF {result['rtf']:.3f}  RSS {result['peak_rss_mb']:.0f} MB  "
+                        f"peak PSS {result['peak_total_pss_mb']:.0f} MB (workers at end {result['workers_pss_mb']:.0f})  "
+                        f"stages {result['stage_ms']}"
+                    )
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process load benchmark for the transcription app")
+    parser.add_argument("--durations", type=float, nargs="+", default=[1, 10, 60, 300], help="clip lengths in seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16])
+    parser.add_argument("--requests", type=int, default=16, help="requests per scenario (at least the concurrency)")
+    parser.add_argument("--tiny-model", action="store_true", help="use a tiny random-weight model (offline)")
+    parser.add_argument("--model", help="local model path or cached model id (overrides MODEL_ID)")
+    parser.add_argument("--out", default="bench_results.json")
+    parser.add_argument("--compare", help="previous results JSON to diff against")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="vox-bench-")
+    if args.tiny_model:
+        os.environ["MODEL_ID"] = build_tiny_model(workdir)
+    elif args.model:
+        os.environ["MODEL_ID"] = args.model
+    # Measure the pipeline, not the caches, and keep benchmark state out of HF_HOME.
+    os.environ["RESULT_CACHE_SIZE"] = "0"
+    os.environ["RESULT_CACHE_DISK"] = "0"
+    os.environ["MAX_QUEUE_DEPTH"] = str(max(args.concurrency) * 2)
+    os.environ.setdefault("WEIGHTS_DIR", os.path.join(workdir, "weights"))
+    os.environ.setdefault("ONNX_DIR", os.path.join(workdir, "onnx"))
+    os.environ.setdefault("IPA_LEXICON_PATH", os.path.join(workdir, "lexicon.sqlite3"))
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+    results = asyncio.run(main_async(args))
+    report = {
+        "revision": git_revision(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "model": os.environ.get("MODEL_ID"),
+        "backend": os.environ.get("INFERENCE_BACKEND", "eager"),
+        "scenarios": results,
+    }
+    if args.compare:
+        print_comparison(results, args.compare)
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
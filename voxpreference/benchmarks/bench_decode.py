@@ -0,0 +1,73 @@
+"""Decode + resample time: audio_io.load_audio vs librosa.load(sr=16000).
+
+Synthetic fixtures (a speech-like harmonic tone with noise) are written in
+memory as WAV, FLAC and MP3 at several sample rates and channel counts. MP3
+fixtures are skipped if the installed libsndfile cannot encode MP3.
+
+Run from the voxpreference directory:
+
+    python -m benchmarks.bench_decode --seconds 5 30 --repeats 5
+"""
+import argparse
+import io
+import statistics
+import time
+
+import librosa
+import numpy as np
+import soundfile as sf
+
+from audio_io import load_audio
+
+FIXTURES = [
+    ("WAV", "PCM_16", 16000, 1),
+    ("WAV", "PCM_16", 44100, 2),
+    ("FLAC", "PCM_16", 16000, 1),
+    ("FLAC", "PCM_16", 48000, 1),
+    ("MP3", "MPEG_LAYER_III", 16000, 1),
+    ("MP3", "MPEG_LAYER_III", 44100, 2),
+]
+
+
+def make_fixture(fmt, subtype, sr, channels, seconds):
+    t = np.arange(int(seconds * sr)) / sr
+    rng = np.random.default_rng(0)
+    signal = sum(np.sin(2 * np.pi * f * t) / (k + 1) for k, f in enumerate((180, 360, 720, 1440)))
+    signal = (0.3 * signal / np.abs(signal).max() + 0.01 * rng.standard_normal(len(t))).astype(np.float32)
+    data = np.stack([signal] * channels, axis=1) if channels > 1 else signal
+    buffer = io.BytesIO()
+    sf.write(buffer, data, sr, format=fmt, subtype=subtype)
+    return buffer.getvalue()
+
+
+def time_decoder(fn, payload, repeats):
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn(io.BytesIO(payload))
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare audio decode paths")
+    parser.add_argument("--seconds", type=float, nargs="+", default=[5.0, 30.0])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'fixture':<26}{'librosa ms':>12}{'audio_io ms':>13}{'speedup':>9}")
+    for seconds in args.seconds:
+        for fmt, subtype, sr, channels in FIXTURES:
+            name = f"{fmt} {sr // 1000}k {'stereo' if channels > 1 else 'mono'} {seconds:g}s"
+            try:
+                payload = make_fixture(fmt, subtype, sr, channels, seconds)
+            except (RuntimeError, ValueError) as e:
+                print(f"{name:<26}skipped ({e})")
+                continue
+            baseline = time_decoder(lambda f: librosa.load(f, sr=16000), payload, args.repeats)
+            fast = time_decoder(load_audio, payload, args.repeats)
+            print(f"{name:<26}{baseline:>12.1f}{fast:>13.1f}{baseline / fast:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
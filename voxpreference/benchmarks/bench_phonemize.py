@@ -0,0 +1,69 @@
+"""Cold vs warm per-call phonemization latency.
+
+"cold" is the old path: phonemizer.phonemize(), which builds a new
+EspeakBackend (and worker pool when njobs > 1) on every call. "warm" borrows
+a backend from the long-lived pool in text_to_ipa. The persistent lexicon is
+bypassed so both sides actually run espeak.
+
+Run from the voxpreference directory:
+
+    python -m benchmarks.bench_phonemize --calls 200
+"""
+import argparse
+import os
+import statistics
+import time
+
+from phonemizer import phonemize
+
+from text_to_ipa import PHONEMIZER_ARGS, _phonemize, get_backend_pool
+
+WORDS = ["good", "morning", "everyone", "pronunciation", "nigeria", "lagos", "water", "thought", "church", "yesterday"]
+
+
+def cold_call(word, njobs):
+    language, backend, strip, preserve_punctuation, punctuation_marks, with_stress = PHONEMIZER_ARGS
+    return phonemize(
+        [word],
+        language=language,
+        backend=backend,
+        strip=strip,
+        preserve_punctuation=preserve_punctuation,
+        punctuation_marks=punctuation_marks,
+        with_stress=with_stress,
+        njobs=njobs
+    )
+
+
+def measure(fn, calls):
+    timings = []
+    for i in range(calls):
+        word = WORDS[i % len(WORDS)]
+        start = time.perf_counter()
+        fn(word)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(name, timings):
+    timings = sorted(timings)
+    p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+    print(f"{name:<28} mean {statistics.mean(timings):8.2f} ms   p50 {statistics.median(timings):8.2f} ms   p95 {p95:8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold vs warm espeak phonemization latency")
+    parser.add_argument("--calls", type=int, default=100)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    get_backend_pool()
+    print(f"Backend pool startup: {(time.perf_counter() - start) * 1000:.1f} ms (paid once)")
+
+    report("cold, njobs=1", measure(lambda w: cold_call(w, 1), args.calls))
+    report(f"cold, njobs={os.cpu_count() or 1}", measure(lambda w: cold_call(w, os.cpu_count() or 1), max(1, args.calls // 10)))
+    report("warm pooled backend", measure(lambda w: _phonemize([w]), args.calls))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+def decode_words(tokenizer, predicted_ids, start_frame=0, frame_duration=0.02):
+    """Decode greedy CTC ids into timed words: [{"text", "start", "end"}] in seconds.
+
+    `start_frame` is the absolute frame index of predicted_ids[0].
+    """
+    output = tokenizer.decode(predicted_ids, output_word_offsets=True)
+    return [
+        {
+            "text": offset["word"],
+            "start": round((start_frame + offset["start_offset"]) * frame_duration, 2),
+            "end": round((start_frame + offset["end_offset"]) * frame_duration, 2)
+        }
+        for offset in output.word_offsets
+    ]
+
+
+class CTCStitcher:
+    """Joins greedy CTC ids from consecutive audio windows and releases finished words.
+
+    A word is only released once a word-delimiter frame follows it, so a word
+    that straddles two windows is decoded from the ids of both.
+    """
+
+    def __init__(self, tokenizer, frame_duration):
+        self.tokenizer = tokenizer
+        self.frame_duration = frame_duration
+        self.delimiter_id = tokenizer.word_delimiter_token_id
+        self._ids = []
+        self._start_frame = 0
+
+    def push(self, predicted_ids, start_frame):
+        """Add the kept ids of a window starting at absolute frame `start_frame`; return finished words."""
+        if not self._ids:
+            self._start_frame = start_frame
+        self._ids.extend(int(i) for i in predicted_ids)
+        cut = 0
+        for i in range(len(self._ids) - 1, -1, -1):
+            if self._ids[i] == self.delimiter_id:
+                cut = i + 1
+                break
+        if not cut:
+            return []
+        words = decode_words(self.tokenizer, self._ids[:cut], self._start_frame, self.frame_duration)
+        self._ids = self._ids[cut:]
+        self._start_frame += cut
+        return words
+
+    def flush(self):
+        """Decode whatever is left after the last window."""
+        words = decode_words(self.tokenizer, self._ids, self._start_frame, self.frame_duration) if self._ids else []
+        self._ids = []
+        return words
@@ -0,0 +1,168 @@
+"""WER/CER evaluation of a fine-tuned checkpoint on a CSV manifest.
+
+The checkpoint is loaded once. Audio decoding and feature extraction run in
+DataLoader worker processes while the main process runs batched forward
+passes, and clips are batched in order of duration so each batch is padded
+as little as possible. For models whose feature extractor takes no attention
+mask, padding would change the logits, so only clips with the same number of
+samples share a forward pass and results don't depend on --batch-size.
+
+Run from the voxpreference directory:
+
+    python evaluate_model.py --checkpoint ./wav2vec2-nigerian-english
+    python evaluate_model.py --checkpoint ./checkpoint-2000 --backend int8 --out eval/ckpt2000.jsonl
+
+Per-utterance results are written as JSON lines; the summary is printed and
+saved next to them as <out>.summary.json.
+"""
+import argparse
+import csv
+import json
+import os
+import time
+
+import torch
+from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor
+
+from audio_io import load_audio
+from finetune_model import clean_text
+from inference import ENGINES, create_engine
+
+
+def edit_distance(reference, hypothesis):
+    """Levenshtein distance between two sequences (words or characters)."""
+    previous = list(range(len(hypothesis) + 1))
+    for i, ref_item in enumerate(reference, 1):
+        current = [i]
+        for j, hyp_item in enumerate(hypothesis, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ref_item != hyp_item)))
+        previous = current
+    return previous[-1]
+
+
+def collate_items(items):
+    return items
+
+
+class ManifestAudio(torch.utils.data.Dataset):
+    """Manifest rows decoded and feature-extracted in DataLoader workers: (index, input_values, duration)."""
+
+    def __init__(self, manifest, processor, limit=0):
+        self.processor = processor
+        with open(manifest, encoding="utf-8") as f:
+            self.rows = list(csv.DictReader(f))
+        if limit:
+            self.rows = self.rows[:limit]
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        row = self.rows[index]
+        with open(row["path"], "rb") as f:
+            audio, _ = load_audio(f)
+        return index, self.processor(audio, sampling_rate=16000).input_values[0], len(audio) / 16000
+
+    def length_sorted_batches(self, batch_size):
+        """Index batches of similar-length clips, by the manifest's duration column or else file size."""
+        if all(row.get("duration") for row in self.rows):
+            length = lambda i: float(self.rows[i]["duration"])
+        else:
+            length = lambda i: os.path.getsize(self.rows[i]["path"])
+        order = sorted(range(len(self.rows)), key=length)
+        return [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+
+
+def evaluate(engine, processor, dataset, batch_size, workers):
+    loader = torch.utils.data.DataLoader(
+        dataset,
+        batch_sampler=dataset.length_sorted_batches(batch_size),
+        num_workers=workers,
+        collate_fn=collate_items,
+        prefetch_factor=4 if workers else None
+    )
+    results = []
+    for items in loader:
+        if engine.use_attention_mask:
+            groups = [items]
+        else:
+            by_length = {}
+            for item in items:
+                by_length.setdefault(len(item[1]), []).append(item)
+            groups = list(by_length.values())
+        for group in groups:
+            results.extend(score_batch(engine, processor, dataset, group))
+    return results
+
+
+def score_batch(engine, processor, dataset, items):
+    """One forward pass over `items`; returns their per-utterance results."""
+    logits = engine.forward_batch([input_values for _, input_values, _ in items])
+    hypotheses = processor.batch_decode([item_logits.argmax(axis=-1) for item_logits in logits])
+    results = []
+    for (index, _, duration), hypothesis in zip(items, hypotheses):
+        row = dataset.rows[index]
+        reference = clean_text(row["transcript"])
+        hypothesis = clean_text(hypothesis)
+        results.append({
+            "path": row["path"],
+            "duration": round(duration, 3),
+            "reference": reference,
+            "hypothesis": hypothesis,
+            "word_errors": edit_distance(reference.split(), hypothesis.split()),
+            "words": len(reference.split()),
+            "char_errors": edit_distance(reference, hypothesis),
+            "chars": len(reference)
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate a checkpoint's WER and CER on a manifest")
+    parser.add_argument("--checkpoint", default="./wav2vec2-nigerian-english", help="model directory or hub id")
+    parser.add_argument("--processor", help="processor directory (default: the checkpoint)")
+    parser.add_argument("--manifest", default="data/val.csv", help="CSV with `path` and `transcript` columns")
+    parser.add_argument("--limit", type=int, default=0, help="evaluate only the first N rows")
+    parser.add_argument("--batch-size", type=int, default=8)
+    parser.add_argument("--workers", type=int, default=min(4, os.cpu_count() or 1), help="audio decoding processes")
+    parser.add_argument("--backend", default="eager", choices=list(ENGINES))
+    parser.add_argument("--out", default="eval_results.jsonl")
+    args = parser.parse_args()
+
+    processor = Wav2Vec2Processor.from_pretrained(args.processor or args.checkpoint)
+    model = Wav2Vec2ForCTC.from_pretrained(args.checkpoint)
+    model.eval()
+    engine = create_engine(args.backend, model, processor)
+    dataset = ManifestAudio(args.manifest, processor, args.limit)
+    print(f"Evaluating {args.checkpoint} ({args.backend}) on {len(dataset)} clips from {args.manifest}")
+
+    start = time.perf_counter()
+    results = evaluate(engine, processor, dataset, args.batch_size, args.workers)
+    elapsed = time.perf_counter() - start
+
+    audio_s = sum(r["duration"] for r in results)
+    summary = {
+        "checkpoint": args.checkpoint,
+        "backend": args.backend,
+        "manifest": args.manifest,
+        "utterances": len(results),
+        "wer": round(sum(r["word_errors"] for r in results) / max(1, sum(r["words"] for r in results)), 4),
+        "cer": round(sum(r["char_errors"] for r in results) / max(1, sum(r["chars"] for r in results)), 4),
+        "audio_s": round(audio_s, 1),
+        "elapsed_s": round(elapsed, 1),
+        "utterances_per_s": round(len(results) / elapsed, 2),
+        "rtf": round(elapsed / audio_s, 4) if audio_s else None
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        for result in sorted(results, key=lambda r: r["path"]):
+            f.write(json.dumps(result) + "\n")
+    with open(f"{args.out}.summary.json", "w") as f:
+        json.dump(summary, f, indent=2)
+    print(json.dumps(summary, indent=2))
+    print(f"Per-utterance results in {args.out}")
+
+
+if __name__ == "__main__":
+    main()
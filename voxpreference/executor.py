@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from contextlib import contextmanager
+
+from metrics import metrics
+
+logger = logging.getLogger("voxpreference.executor")
+
+
+class Overloaded(Exception):
+    """Raised when a request arrives while every worker is busy and the queue is full."""
+
+
+class RequestTimings:
+    """Queue-wait and execution time of one request, split by stage."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queue_wait_s = 0.0
+        self.exec_s = 0.0
+        self.stages = {}
+
+    def add(self, stage, queue_wait_s, exec_s):
+        self.queue_wait_s += queue_wait_s
+        self.exec_s += exec_s
+        wait, run = self.stages.get(stage, (0.0, 0.0))
+        self.stages[stage] = (wait + queue_wait_s, run + exec_s)
+        metrics.observe(f"stage_{stage}_queue_wait", queue_wait_s)
+        metrics.observe(f"stage_{stage}_exec", exec_s)
+
+    def finish(self):
+        """Record request totals in the global metrics."""
+        metrics.observe("request_queue_wait", self.queue_wait_s)
+        metrics.observe("request_exec", self.exec_s)
+        metrics.observe("request_total", time.perf_counter() - self.started)
+
+    def as_dict(self):
+        return {
+            "queue_wait_ms": round(self.queue_wait_s * 1000, 1),
+            "exec_ms": round(self.exec_s * 1000, 1),
+            "stages": {
+                stage: {"queue_wait_ms": round(wait * 1000, 1), "exec_ms": round(run * 1000, 1)}
+                for stage, (wait, run) in self.stages.items()
+            }
+        }
+
+    def headers(self):
+        return {
+            "X-Queue-Wait-Ms": f"{self.queue_wait_s * 1000:.1f}",
+            "X-Exec-Ms": f"{self.exec_s * 1000:.1f}"
+        }
+
+
+def _wake(waiter):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class BoundedExecutor:
+    """Thread pool for the CPU-bound stages of a request, with admission control.
+
+    At most `max_workers + max_queue` requests are admitted at once; further
+    requests are rejected immediately with Overloaded instead of queuing without
+    bound (acquire_wait instead waits for a slot, for work that would rather be
+    late than dropped). Each admitted request has at most one stage running or
+    queued here.
+    """
+
+    def __init__(self, max_workers, max_queue, name="cpu"):
+        self.max_workers = max(1, max_workers)
+        self.capacity = self.max_workers + max(0, max_queue)
+        self._admitted = 0
+        self._running = 0
+        self._lock = threading.Lock()
+        self._waiters = deque()  # futures of acquire_wait() callers, oldest first
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+
+    def acquire(self):
+        """Admit one request or raise Overloaded. Pair with release()."""
+        with self._lock:
+            if self._admitted >= self.capacity:
+                metrics.inc("requests_rejected_total")
+                raise Overloaded(f"{self._admitted} requests in flight (capacity {self.capacity})")
+            self._admitted += 1
+            metrics.set("requests_in_flight", self._admitted)
+
+    async def acquire_wait(self):
+        """Admit one request, waiting for a free slot instead of raising Overloaded. Pair with release()."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                if self._admitted < self.capacity:
+                    self._admitted += 1
+                    metrics.set("requests_in_flight", self._admitted)
+                    return
+                waiter = loop.create_future()
+                self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                with self._lock:
+                    if waiter in self._waiters:
+                        self._waiters.remove(waiter)
+                    else:
+                        # Cancelled after being picked for a wake-up: pass it on to the next waiter.
+                        self._wake_next()
+                raise
+
+    def release(self):
+        with self._lock:
+            self._admitted -= 1
+            metrics.set("requests_in_flight", self._admitted)
+            self._wake_next()
+
+    def _wake_next(self):
+        # Called with _lock held. The woken caller re-checks for a free slot itself.
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.get_loop().call_soon_threadsafe(_wake, waiter)
+                return
+
+    @contextmanager
+    def admit(self):
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def _update_gauges(self, delta):
+        with self._lock:
+            self._running += delta
+            metrics.set("executor_busy_workers", self._running)
+
+    async def run(self, timings, stage, fn, *args, **kwargs):
+        """Run fn(*args, **kwargs) on the pool and record its queue wait and run time under `stage`."""
+        submitted = time.perf_counter()
+
+        def task():
+            started = time.perf_counter()
+            self._update_gauges(1)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._update_gauges(-1)
+                timings.add(stage, started - submitted, time.perf_counter() - started)
+
+        future = self._executor.submit(task)
+        try:
+            return await asyncio.wrap_future(future)
+        except asyncio.CancelledError:
+            # A task that already started can't be stopped; wait for it so the caller
+            # can safely close the files it was working on.
+            if not future.done():
+                await asyncio.wait([asyncio.wrap_future(future)])
+            raise
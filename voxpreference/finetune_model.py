@@ -1,52 +1,184 @@
-from datasets import load_dataset, Audio
+from datasets import load_dataset, load_from_disk, Audio
 from transformers import (
     Wav2Vec2ForCTC,
     Wav2Vec2Processor,
     TrainingArguments,
     Trainer,
+    TrainerCallback,
 )
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Any, Dict, List, Union
 
+import csv
+import hashlib
+import json
+import math
+import os
+import random
 import re
+import shutil
+import time
+
+import numpy as np
+import torch
+
+from audio_io import load_audio
+
+BASE_MODEL = "facebook/wav2vec2-base-960h"
+DATA_FILES = {"train": "data/train.csv", "validation": "data/val.csv"}
+# Preprocessed features are saved here, one directory per processor config + manifest version.
+FEATURE_CACHE_DIR = os.getenv("FEATURE_CACHE_DIR", "data/features")
+PREPROCESS_WORKERS = int(os.getenv("PREPROCESS_WORKERS", str(os.cpu_count() or 1)))
+# Streaming mode decodes audio on the fly instead of materializing features, for corpora larger than RAM.
+TRAIN_STREAMING = os.getenv("TRAIN_STREAMING", "0") == "1"
+STREAM_SHUFFLE_BUFFER = int(os.getenv("STREAM_SHUFFLE_BUFFER", "1000"))
+STREAM_DECODE_WORKERS = int(os.getenv("STREAM_DECODE_WORKERS", "4"))
 
 def clean_text(text):
     text = text.lower()
     text = re.sub(r"[^a-zA-Z' ]+", '', text)  # keep only letters, apostrophes, and spaces
     return text.strip()
 
-dataset = load_dataset(
-    "csv",
-    data_files={"train": "data/train.csv", "validation": "data/val.csv"},
-    delimiter=","
-)
-
-dataset = dataset.cast_column("path", Audio(sampling_rate=16000))
+def features_key(processor, data_files=DATA_FILES):
+    """Hash of everything the cached features depend on: processor config, vocab, text cleaning and manifests."""
+    digest = hashlib.sha1()
+    digest.update(json.dumps(processor.feature_extractor.to_dict(), sort_keys=True, default=str).encode())
+    digest.update(json.dumps(processor.tokenizer.get_vocab(), sort_keys=True).encode())
+    digest.update(clean_text.__code__.co_code)
+    for split in sorted(data_files):
+        with open(data_files[split], "rb") as f:
+            digest.update(split.encode() + hashlib.sha1(f.read()).digest())
+    return digest.hexdigest()[:16]
 
-processor = Wav2Vec2Processor.from_pretrained("facebook/wav2vec2-base-960h")
-model = Wav2Vec2ForCTC.from_pretrained(
-    "facebook/wav2vec2-base-960h",
-    ctc_loss_reduction="mean",
-    pad_token_id=processor.tokenizer.pad_token_id,
-)
-model.freeze_feature_encoder()
-def prepare_batch(batch):
+def prepare_batch(batch, processor):
     audio = batch["path"]
-    batch["input_values"] = processor(audio["array"], sampling_rate=16000).input_values[0]
+    # Stored as float16: half the disk and page cache of fp32, well within the precision of 16-bit source audio.
+    batch["input_values"] = np.asarray(processor(audio["array"], sampling_rate=16000).input_values[0], dtype=np.float16)
     batch["input_length"] = len(batch["input_values"])
     cleaned = clean_text(batch["transcript"])
     batch["labels"] = processor(text=cleaned).input_ids
     return batch
 
-dataset = dataset.map(prepare_batch, remove_columns=dataset["train"].column_names)
+def load_features(processor, data_files=DATA_FILES, cache_dir=FEATURE_CACHE_DIR, num_proc=PREPROCESS_WORKERS):
+    """Return the train/validation features, computing and saving them only if no cached copy matches."""
+    path = os.path.join(cache_dir, features_key(processor, data_files))
+    if os.path.exists(os.path.join(path, "dataset_dict.json")):
+        print(f"Loading preprocessed features from {path}")
+        return load_from_disk(path)
+
+    dataset = load_dataset("csv", data_files=data_files, delimiter=",")
+    dataset = dataset.cast_column("path", Audio(sampling_rate=16000))
+    dataset = dataset.map(
+        prepare_batch,
+        fn_kwargs={"processor": processor},
+        remove_columns=dataset["train"].column_names,
+        num_proc=max(1, num_proc),
+        desc="Extracting features"
+    )
+    # Save under a temporary name and rename, so an interrupted run never leaves a half-written cache.
+    tmp_path = f"{path}.tmp"
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    dataset.save_to_disk(tmp_path)
+    os.replace(tmp_path, path)
+    print(f"Saved preprocessed features to {path}")
+    return load_from_disk(path)
+
+def count_rows(manifest):
+    with open(manifest, encoding="utf-8") as f:
+        return sum(1 for _ in csv.DictReader(f))
+
+class StreamingSpeechDataset(torch.utils.data.IterableDataset):
+    """Yields training examples straight from a CSV manifest, decoding audio as it goes.
+
+    Memory is bounded by the shuffle buffer, whatever the corpus size: the
+    manifest is read row by row, each DataLoader worker handles its own 1/N
+    share of the rows, and rows are shuffled through a buffer of
+    `shuffle_buffer` manifest rows (reseeded every epoch via set_epoch) before
+    their audio is decoded.
+
+    When the manifest has a `duration` column (see utils/split_shuffle_data.py)
+    and `bucket_size` > 1, each full buffer is sorted by duration and released
+    as runs of `bucket_size` similar-length clips in random order, so batches
+    need little padding.
+    """
+
+    def __init__(self, manifest, processor, shuffle_buffer=STREAM_SHUFFLE_BUFFER, bucket_size=1, seed=42):
+        self.manifest = manifest
+        self.processor = processor
+        self.shuffle_buffer = max(1, shuffle_buffer)
+        self.bucket_size = max(1, bucket_size)
+        self.seed = seed
+        self.epoch = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+
+    def _rows(self):
+        worker = torch.utils.data.get_worker_info()
+        worker_id, num_workers = (worker.id, worker.num_workers) if worker else (0, 1)
+        with open(self.manifest, encoding="utf-8") as f:
+            for i, row in enumerate(csv.DictReader(f)):
+                if i % num_workers == worker_id:
+                    yield row
+
+    def _decode(self, row):
+        try:
+            with open(row["path"], "rb") as f:
+                audio, _ = load_audio(f)
+        except Exception as e:
+            print(f"Skipping {row['path']}: {e}")
+            return None
+        return {
+            "input_values": self.processor(audio, sampling_rate=16000).input_values[0],
+            "labels": self.processor(text=clean_text(row["transcript"])).input_ids,
+        }
+
+    def _bucketed(self, buffer, rng):
+        buffer.sort(key=lambda row: float(row["duration"]))
+        buckets = [buffer[i:i + self.bucket_size] for i in range(0, len(buffer), self.bucket_size)]
+        rng.shuffle(buckets)
+        for bucket in buckets:
+            yield from bucket
+
+    def _shuffled_rows(self, rng):
+        buffer = []
+        bucketing = None
+        for row in self._rows():
+            if bucketing is None:
+                bucketing = self.bucket_size > 1 and bool(row.get("duration"))
+            if len(buffer) < self.shuffle_buffer:
+                buffer.append(row)
+            elif bucketing:
+                yield from self._bucketed(buffer, rng)
+                buffer = [row]
+            else:
+                i = rng.randrange(len(buffer))
+                yield buffer[i]
+                buffer[i] = row
+        if bucketing:
+            yield from self._bucketed(buffer, rng)
+        else:
+            rng.shuffle(buffer)
+            yield from buffer
+
+    def __iter__(self):
+        worker = torch.utils.data.get_worker_info()
+        rng = random.Random(self.seed + 1000 * self.epoch + (worker.id if worker else 0))
+        for row in self._shuffled_rows(rng):
+            example = self._decode(row)
+            if example is not None:
+                yield example
 
 @dataclass
 class DataCollatorCTCWithPadding:
     processor: Wav2Vec2Processor
     padding: Union[bool, str] = True
+    # Audio samples seen vs. samples after padding, for the padding-waste report.
+    real_samples: int = field(default=0, init=False)
+    padded_samples: int = field(default=0, init=False)
 
     def __call__(self, features: List[Dict[str, Any]]) -> Dict[str, Any]:
-        input_features = [{"input_values": f["input_values"]} for f in features]
+        input_features = [{"input_values": np.asarray(f["input_values"], dtype=np.float32)} for f in features]
         label_features = [{"input_ids": f["labels"]} for f in features]
 
         batch = self.processor.pad(
@@ -61,43 +193,105 @@ class DataCollatorCTCWithPadding:
                 return_tensors="pt"
             )
 
+        self.real_samples += sum(len(f["input_values"]) for f in input_features)
+        self.padded_samples += batch["input_values"].numel()
+
         labels = labels_batch["input_ids"].masked_fill(labels_batch["input_ids"] == self.processor.tokenizer.pad_token_id, -100)
         batch["labels"] = labels
         return batch
 
-data_collator = DataCollatorCTCWithPadding(processor=processor, padding=True)
-
-training_args = TrainingArguments(
-    output_dir="./wav2vec2-nigerian-english",
-    group_by_length=False,
-    per_device_train_batch_size=8,
-    per_device_eval_batch_size=8,
-    # evaluation_strategy="steps", 
-    num_train_epochs=10,
-    fp16=True,
-    save_steps=200,
-    # eval_steps=200,   
-    logging_steps=100,
-    learning_rate=1e-4,
-    warmup_steps=500,
-    save_total_limit=2,
-    push_to_hub=False,
-)
+class PaddingWasteCallback(TrainerCallback):
+    """Logs the share of each epoch's input samples that were padding.
 
-trainer = Trainer(
-    model=model,
-    data_collator=data_collator,
-    args=training_args,
-    train_dataset=dataset["train"],
-    # eval_dataset=dataset["validation"],
-    # tokenizer=processor.tokenizer,  # REMOVE THIS
-    processor=processor,
-)
+    Counts come from the collator, so they are only complete with
+    dataloader_num_workers=0 (worker processes collate on their own copies).
+    """
+
+    def __init__(self, collator):
+        self.collator = collator
+
+    def on_epoch_end(self, args, state, control, **kwargs):
+        real, padded = self.collator.real_samples, self.collator.padded_samples
+        if padded:
+            print(f"Epoch {state.epoch:.0f}: padding waste {1 - real / padded:.1%} ({padded - real} of {padded} input samples)")
+        self.collator.real_samples = self.collator.padded_samples = 0
+
+class ThroughputCallback(TrainerCallback):
+    """Prints training throughput in samples per second at every logging step."""
+
+    def on_train_begin(self, args, state, control, **kwargs):
+        self.started = time.perf_counter()
+        self.start_step = state.global_step
+
+    def on_log(self, args, state, control, **kwargs):
+        elapsed = time.perf_counter() - self.started
+        samples = (state.global_step - self.start_step) * args.train_batch_size * args.gradient_accumulation_steps * args.world_size
+        if elapsed > 0 and samples:
+            print(f"Step {state.global_step}: {samples / elapsed:.1f} samples/s")
+
+def main():
+    processor = Wav2Vec2Processor.from_pretrained(BASE_MODEL)
+    model = Wav2Vec2ForCTC.from_pretrained(
+        BASE_MODEL,
+        ctc_loss_reduction="mean",
+        pad_token_id=processor.tokenizer.pad_token_id,
+    )
+    model.freeze_feature_encoder()
+
+    num_train_epochs = 10
+    batch_size = 8
+    if TRAIN_STREAMING:
+        train_dataset = StreamingSpeechDataset(DATA_FILES["train"], processor, bucket_size=batch_size)
+        eval_dataset = StreamingSpeechDataset(DATA_FILES["validation"], processor, shuffle_buffer=1)
+        # An iterable dataset has no length for the Trainer, so the schedule is given in steps.
+        max_steps = math.ceil(count_rows(DATA_FILES["train"]) / batch_size) * num_train_epochs
+    else:
+        dataset = load_features(processor)
+        train_dataset, eval_dataset = dataset["train"], dataset["validation"]
+        max_steps = -1
+
+    data_collator = DataCollatorCTCWithPadding(processor=processor, padding=True)
+
+    training_args = TrainingArguments(
+        output_dir="./wav2vec2-nigerian-english",
+        # Batch clips of similar length together so little of each batch is padding
+        # (needs the precomputed lengths, so not in streaming mode).
+        group_by_length=not TRAIN_STREAMING,
+        length_column_name="input_length",
+        per_device_train_batch_size=batch_size,
+        per_device_eval_batch_size=batch_size,
+        # evaluation_strategy="steps",
+        num_train_epochs=num_train_epochs,
+        max_steps=max_steps,
+        dataloader_num_workers=STREAM_DECODE_WORKERS if TRAIN_STREAMING else 0,
+        fp16=True,
+        save_steps=200,
+        # eval_steps=200,
+        logging_steps=100,
+        learning_rate=1e-4,
+        warmup_steps=500,
+        save_total_limit=2,
+        push_to_hub=False,
+    )
+
+    trainer = Trainer(
+        model=model,
+        data_collator=data_collator,
+        args=training_args,
+        train_dataset=train_dataset,
+        # eval_dataset=dataset["validation"],
+        # tokenizer=processor.tokenizer,  # REMOVE THIS
+        processor=processor,
+        callbacks=[PaddingWasteCallback(data_collator), ThroughputCallback()],
+    )
+
+    trainer.train()
 
-trainer.train()
+    # Manual evaluation after training
+    trainer.evaluate(eval_dataset=eval_dataset)
 
-# Manual evaluation after training
-trainer.evaluate(eval_dataset=dataset["validation"])
+    trainer.save_model("./wav2vec2-nigerian-english")
+    processor.save_pretrained("./wav2vec2-nigerian-english")
 
-trainer.save_model("./wav2vec2-nigerian-english")
-processor.save_pretrained("./wav2vec2-nigerian-english")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import json
+import logging
+import os
+import time
+
+import numpy as np
+import torch
+from transformers import Wav2Vec2Config, Wav2Vec2ForCTC
+
+logger = logging.getLogger("voxpreference.inference")
+
+MODEL_ID = os.getenv("MODEL_ID", "thebickersteth/wav2vec2-nigerian-english")
+INFERENCE_BACKEND = os.getenv("INFERENCE_BACKEND", "eager").lower()
+ONNX_DIR = os.getenv("ONNX_DIR", os.path.join(os.getenv("HF_HOME", "/app/hf_home"), "voxpreference", "onnx"))
+WEIGHTS_DIR = os.getenv("WEIGHTS_DIR", os.path.join(os.getenv("HF_HOME", "/app/hf_home"), "voxpreference", "weights"))
+
+
+def _export_weights(model, directory):
+    """Write config, revision and a torch state dict that later starts can memory-map."""
+    os.makedirs(directory, exist_ok=True)
+    model.config.save_pretrained(directory)
+    tmp_path = os.path.join(directory, f"model.pt.{os.getpid()}.tmp")
+    torch.save(model.state_dict(), tmp_path)
+    with open(os.path.join(directory, "meta.json"), "w") as f:
+        json.dump({"revision": getattr(model.config, "_commit_hash", None)}, f)
+    # Rename last so other workers never map a half-written file.
+    os.replace(tmp_path, os.path.join(directory, "model.pt"))
+
+
+def _weights_directory(model_id, weights_dir):
+    return os.path.join(weights_dir, model_id.strip("/").replace("/", "--"))
+
+
+def load_config(model_id=MODEL_ID, weights_dir=WEIGHTS_DIR):
+    """Load only the model config, with the revision in `_commit_hash`; no weights are read.
+
+    Prefers the copy exported by load_model, so it describes the same
+    revision as the memory-mapped weights.
+    """
+    directory = _weights_directory(model_id, weights_dir)
+    meta_path = os.path.join(directory, "meta.json")
+    if os.path.exists(meta_path):
+        config = Wav2Vec2Config.from_pretrained(directory)
+        with open(meta_path) as f:
+            config._commit_hash = json.load(f).get("revision")
+        return config
+    return Wav2Vec2Config.from_pretrained(model_id)
+
+
+def _load_mapped(directory, model_id):
+    """Build the model on the meta device and assign tensors backed by an mmap of the exported state dict."""
+    config = Wav2Vec2Config.from_pretrained(directory)
+    with torch.device("meta"):
+        model = Wav2Vec2ForCTC(config)
+    state_dict = torch.load(os.path.join(directory, "model.pt"), mmap=True, weights_only=True, map_location="cpu")
+    model.load_state_dict(state_dict, assign=True)
+    if any(t.is_meta for t in list(model.parameters()) + list(model.buffers())):
+        raise RuntimeError("some tensors were not restored from the state dict")
+    with open(os.path.join(directory, "meta.json")) as f:
+        model.config._commit_hash = json.load(f).get("revision")
+    model.name_or_path = model_id
+    model.eval()
+    return model
+
+
+def load_model(model_id=MODEL_ID, weights_dir=WEIGHTS_DIR):
+    """Load the CTC model with its weights memory-mapped from a local state-dict file.
+
+    The first start loads the model with from_pretrained, exports it to
+    `weights_dir` and reloads it from the export. Every start therefore ends up
+    with tensors backed by an mmap of that file, so load time is mostly page-ins
+    and every worker process on the host shares the same page-cache copy of the
+    weights, including the first one.
+    """
+    directory = _weights_directory(model_id, weights_dir)
+    weights_path = os.path.join(directory, "model.pt")
+    started = time.perf_counter()
+    if os.path.exists(weights_path):
+        try:
+            model = _load_mapped(directory, model_id)
+            logger.info(f"Memory-mapped {model_id} weights from {weights_path} in {time.perf_counter() - started:.2f}s")
+            return model
+        except Exception as e:
+            logger.warning(f"Could not memory-map {weights_path} ({e}); falling back to from_pretrained.")
+
+    model = Wav2Vec2ForCTC.from_pretrained(model_id)
+    model.eval()
+    logger.info(f"Loaded {model_id} with from_pretrained in {time.perf_counter() - started:.2f}s")
+    try:
+        _export_weights(model, directory)
+        logger.info(f"Exported weights to {weights_path} for memory-mapped loading")
+    except OSError as e:
+        logger.warning(f"Could not export weights to {directory}: {e}")
+        return model
+    try:
+        # Swap the private heap copy for the shared mapping before the engine is built.
+        mapped = _load_mapped(directory, model_id)
+    except Exception as e:
+        logger.warning(f"Could not memory-map the exported {weights_path} ({e}); keeping the from_pretrained copy.")
+        return model
+    logger.info(f"Reloaded {model_id} from the memory-mapped export")
+    return mapped
+
+
+def warm_up(engine, seconds=1.0):
+    """Run one forward pass on a synthetic clip so the first real request doesn't pay for lazy init."""
+    noise = np.random.default_rng(0).standard_normal(int(seconds * 16000)).astype(np.float32) * 0.01
+    inputs = engine.processor(noise, sampling_rate=16000)
+    started = time.perf_counter()
+    engine.forward_batch([inputs.input_values[0]])
+    return time.perf_counter() - started
+
+
+class InferenceEngine:
+    """Runs batched CTC forward passes for a Wav2Vec2 model.
+
+    Subclasses only implement `_forward`, which maps padded input_values (and an
+    attention mask when the feature extractor uses one) to logits as NumPy arrays.
+    """
+
+    name = None
+
+    def __init__(self, model, processor):
+        self.model = model
+        self.processor = processor
+        self.use_attention_mask = bool(processor.feature_extractor.return_attention_mask)
+
+    def forward_batch(self, batch):
+        """Pad 1-D input_values arrays together, run one forward pass and return per-item logits."""
+        features = self.processor.feature_extractor.pad(
+            [{"input_values": values} for values in batch],
+            padding=True,
+            return_attention_mask=True,
+            return_tensors="np"
+        )
+        attention_mask = features["attention_mask"].astype(np.int64) if self.use_attention_mask else None
+        logits = self._forward(features["input_values"].astype(np.float32, copy=False), attention_mask)
+        frame_counts = self.model._get_feat_extract_output_lengths(torch.tensor([len(values) for values in batch]))
+        return [logits[i, :int(n)] for i, n in enumerate(frame_counts)]
+
+    def _forward(self, input_values, attention_mask):
+        raise NotImplementedError
+
+
+class EagerEngine(InferenceEngine):
+    """fp32 PyTorch eager inference."""
+
+    name = "eager"
+
+    def _forward(self, input_values, attention_mask):
+        kwargs = {}
+        if attention_mask is not None:
+            kwargs["attention_mask"] = torch.from_numpy(attention_mask)
+        with torch.inference_mode():
+            return self.model(torch.from_numpy(input_values), **kwargs).logits.numpy()
+
+
+class DynamicInt8Engine(EagerEngine):
+    """PyTorch eager inference with Linear layers dynamically quantized to INT8.
+
+    The model is quantized in place, so no fp32 copy of the Linear weights is kept.
+    """
+
+    name = "int8"
+
+    def __init__(self, model, processor):
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+        super().__init__(model, processor)
+
+
+class _CTCLogits(torch.nn.Module):
+    """Export wrapper returning only the logits tensor."""
+
+    def __init__(self, model, use_attention_mask):
+        super().__init__()
+        self.model = model
+        self.use_attention_mask = use_attention_mask
+
+    def forward(self, input_values, attention_mask=None):
+        if self.use_attention_mask:
+            return self.model(input_values, attention_mask=attention_mask).logits
+        return self.model(input_values).logits
+
+
+class OnnxEngine(InferenceEngine):
+    """Inference through onnxruntime on a graph exported from the PyTorch model.
+
+    The graph is exported once into ONNX_DIR and reused on later starts.
+    """
+
+    name = "onnx"
+
+    def __init__(self, model, processor, onnx_dir=ONNX_DIR):
+        super().__init__(model, processor)
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise RuntimeError("INFERENCE_BACKEND=onnx needs onnxruntime: pip install onnxruntime")
+        path = os.path.join(onnx_dir, f"{model.name_or_path.replace('/', '--')}.onnx")
+        if not os.path.exists(path):
+            self.export(path)
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = torch.get_num_threads()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        logger.info(f"Loaded ONNX graph from {path}")
+
+    def export(self, path):
+        logger.info(f"Exporting {self.model.name_or_path} to ONNX at {path}")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        dummy = torch.zeros(1, 16000, dtype=torch.float32)
+        args = (dummy, torch.ones(1, 16000, dtype=torch.int64)) if self.use_attention_mask else (dummy,)
+        input_names = ["input_values", "attention_mask"] if self.use_attention_mask else ["input_values"]
+        dynamic_axes = {name: {0: "batch", 1: "samples"} for name in input_names}
+        dynamic_axes["logits"] = {0: "batch", 1: "frames"}
+        tmp_path = f"{path}.tmp"
+        with torch.no_grad():
+            torch.onnx.export(
+                _CTCLogits(self.model, self.use_attention_mask).eval(),
+                args,
+                tmp_path,
+                input_names=input_names,
+                output_names=["logits"],
+                dynamic_axes=dynamic_axes,
+                opset_version=14
+            )
+        # Rename last so other workers never load a half-written graph.
+        os.replace(tmp_path, path)
+
+    def _forward(self, input_values, attention_mask):
+        feeds = {"input_values": input_values}
+        if attention_mask is not None:
+            feeds["attention_mask"] = attention_mask
+        return self.session.run(["logits"], feeds)[0]
+
+
+ENGINES = {engine.name: engine for engine in (EagerEngine, DynamicInt8Engine, OnnxEngine)}
+
+
+def create_engine(name, model, processor):
+    """Build the inference engine called `name` (eager, int8 or onnx) around a loaded model."""
+    try:
+        engine_cls = ENGINES[name]
+    except KeyError:
+        raise ValueError(f"Unknown inference backend {name!r}; expected one of {sorted(ENGINES)}")
+    logger.info(f"Using {name} inference backend")
+    return engine_cls(model, processor)
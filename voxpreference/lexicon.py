@@ -0,0 +1,87 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+
+logger = logging.getLogger("voxpreference.lexicon")
+
+DEFAULT_LEXICON_PATH = os.path.join(os.getenv("HF_HOME", "/app/hf_home"), "voxpreference", "ipa_lexicon.sqlite3")
+
+
+def settings_key(*settings):
+    """Short stable key for a set of phonemizer settings."""
+    return hashlib.sha1(repr(settings).encode("utf-8")).hexdigest()[:16]
+
+
+class Lexicon:
+    """Persistent word -> IPA store shared by every worker process on the host.
+
+    Backed by SQLite in WAL mode, so any number of processes can read while one
+    writes. Each thread gets its own connection.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS lexicon ("
+                "settings TEXT NOT NULL, word TEXT NOT NULL, ipa TEXT NOT NULL, "
+                "PRIMARY KEY (settings, word)) WITHOUT ROWID"
+            )
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, settings, words):
+        """Return {word: ipa} for the words already in the lexicon (empty on database errors)."""
+        found = {}
+        words = list(words)
+        try:
+            conn = self._connect()
+            # Stay well below SQLite's bound-parameter limit.
+            for i in range(0, len(words), 500):
+                chunk = words[i:i + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT word, ipa FROM lexicon WHERE settings = ? AND word IN ({placeholders})",
+                    [settings, *chunk]
+                )
+                found.update(rows)
+        except sqlite3.Error as e:
+            logger.warning(f"IPA lexicon lookup failed: {e}")
+        return found
+
+    def put_many(self, settings, entries):
+        """Store {word: ipa} pairs. Failures are logged, not raised: the lexicon is only a cache."""
+        try:
+            with self._connect() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO lexicon (settings, word, ipa) VALUES (?, ?, ?)",
+                    [(settings, word, ipa) for word, ipa in entries.items()]
+                )
+        except sqlite3.Error as e:
+            logger.warning(f"IPA lexicon write failed: {e}")
+
+    def count(self, settings):
+        return self._connect().execute("SELECT COUNT(*) FROM lexicon WHERE settings = ?", (settings,)).fetchone()[0]
+
+
+def open_lexicon(path=None):
+    """Open the lexicon at `path` (default: IPA_LEXICON_PATH), or return None if it is disabled or unusable."""
+    path = os.getenv("IPA_LEXICON_PATH", DEFAULT_LEXICON_PATH) if path is None else path
+    if not path:
+        return None
+    try:
+        return Lexicon(path)
+    except (OSError, sqlite3.Error) as e:
+        logger.warning(f"IPA lexicon at {path} unavailable, phonemizing without it: {e}")
+        return None
@@ -0,0 +1,52 @@
+import threading
+from collections import deque
+
+# Number of most recent observations kept per timing for percentiles.
+RECENT_SAMPLES = 1024
+
+
+class Metrics:
+    """Thread-safe in-process counters, gauges and timing summaries, served on /metrics."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._timings = {}
+
+    def inc(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set(self, name, value):
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name, seconds):
+        with self._lock:
+            timing = self._timings.get(name)
+            if timing is None:
+                timing = self._timings[name] = {"count": 0, "sum_s": 0.0, "max_s": 0.0, "recent": deque(maxlen=RECENT_SAMPLES)}
+            timing["count"] += 1
+            timing["sum_s"] += seconds
+            timing["max_s"] = max(timing["max_s"], seconds)
+            timing["recent"].append(seconds)
+
+    def snapshot(self):
+        with self._lock:
+            timings = {}
+            for name, timing in self._timings.items():
+                recent = sorted(timing["recent"])
+                summary = {
+                    "count": timing["count"],
+                    "sum_s": round(timing["sum_s"], 6),
+                    "mean_s": round(timing["sum_s"] / timing["count"], 6),
+                    "max_s": round(timing["max_s"], 6)
+                }
+                for q in (50, 95, 99):
+                    summary[f"p{q}_s"] = round(recent[min(len(recent) - 1, int(len(recent) * q / 100))], 6)
+                timings[name] = summary
+            return {"counters": dict(self._counters), "gauges": dict(self._gauges), "timings": timings}
+
+
+metrics = Metrics()
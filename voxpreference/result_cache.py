@@ -0,0 +1,133 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger("voxpreference.result_cache")
+
+
+def file_sha256(fileobj, chunk_size=1024 * 1024):
+    """Hex SHA-256 of a seekable file's contents; leaves the file rewound."""
+    digest = hashlib.sha256()
+    fileobj.seek(0)
+    for chunk in iter(lambda: fileobj.read(chunk_size), b""):
+        digest.update(chunk)
+    fileobj.seek(0)
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """Transcription responses keyed by audio content hash and model revision.
+
+    Entries live in a size-bounded in-memory LRU. With `disk_dir` set, they are
+    also written there as JSON files, so they survive restarts and are shared
+    by worker processes; disk hits are promoted back into memory.
+
+    The disk tier holds at most about `max_disk_entries` files: once a put
+    takes it over the limit, the files with the oldest mtime (disk hits
+    refresh it) are deleted until a tenth of the room is free again.
+    """
+
+    def __init__(self, max_entries, namespace, disk_dir=None, max_disk_entries=10000):
+        self.max_entries = max(0, max_entries)
+        self.namespace = namespace
+        self.disk_dir = disk_dir
+        self.max_disk_entries = max(1, max_disk_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+        self._disk_count = 0
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._disk_count = len(self._disk_files())
+
+    def key(self, content_digest):
+        return hashlib.sha256(f"{self.namespace}:{content_digest}".encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f"{key}.json")
+
+    def _remember(self, key, value):
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                return value
+        if not self.disk_dir:
+            return None
+        try:
+            with open(self._path(key), encoding="utf-8") as f:
+                value = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cache entry {key}: {e}")
+            return None
+        try:
+            # Recently used entries are the last to be evicted from disk.
+            os.utime(self._path(key))
+        except OSError:
+            pass
+        self._remember(key, value)
+        return value
+
+    def put(self, key, value):
+        self._remember(key, value)
+        if not self.disk_dir:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not write cache entry {key}: {e}")
+            return
+        with self._disk_lock:
+            self._disk_count += 1
+            if self._disk_count > self.max_disk_entries:
+                self._evict_disk()
+
+    def _disk_files(self):
+        """(mtime, path) of every entry file in the disk tier."""
+        files = []
+        for directory, _, names in os.walk(self.disk_dir):
+            for name in names:
+                if not name.endswith(".json"):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    files.append((os.stat(path).st_mtime_ns, path))
+                except OSError:
+                    pass
+        return files
+
+    def _evict_disk(self):
+        # Other worker processes write here too, so the count is re-taken from the directory.
+        files = sorted(self._disk_files())
+        excess = len(files) - int(self.max_disk_entries * 0.9)
+        removed = 0
+        for _, path in files[:max(0, excess)]:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                pass
+        self._disk_count = len(files) - removed
+        logger.info(f"Evicted {removed} result cache file(s) from {self.disk_dir}; {self._disk_count} left")
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,121 @@
+import logging
+import os
+import shutil
+import tempfile
+from dataclasses import dataclass
+
+import librosa
+import numpy as np
+import soundfile as sf
+
+from audio_io import resample_stream, to_mono
+
+logger = logging.getLogger("voxpreference.streaming")
+
+SAMPLING_RATE = 16000
+SPOOL_MAX_MEMORY = int(os.getenv("STREAM_SPOOL_MAX_MEMORY", str(8 * 1024 * 1024)))
+
+
+@dataclass
+class Window:
+    """A slice of 16 kHz audio plus the sample range whose predictions should be kept."""
+    samples: np.ndarray
+    start: int
+    keep_start: int
+    keep_end: int
+
+    @property
+    def end(self):
+        return self.start + len(self.samples)
+
+
+def probe_duration(fileobj):
+    """Read the duration of an audio file from its header, or None if libsndfile cannot parse it."""
+    try:
+        return sf.info(fileobj).duration
+    except RuntimeError:
+        return None
+    finally:
+        fileobj.seek(0)
+
+
+def spool_upload(fileobj, max_memory=SPOOL_MAX_MEMORY):
+    """Copy an upload into a temp file owned (and closed) by the caller; spills to disk above max_memory."""
+    spool = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    fileobj.seek(0)
+    shutil.copyfileobj(fileobj, spool, 1024 * 1024)
+    spool.seek(0)
+    return spool
+
+
+def iter_blocks(fileobj, block_s=10.0):
+    """Yield mono float32 16 kHz blocks of an audio file without decoding it all at once.
+
+    Falls back to a full librosa decode for containers libsndfile cannot read.
+    """
+    try:
+        f = sf.SoundFile(fileobj)
+    except RuntimeError as e:
+        logger.warning(f"libsndfile cannot stream this upload ({e}); decoding it in one piece.")
+        fileobj.seek(0)
+        audio, _ = librosa.load(fileobj, sr=SAMPLING_RATE)
+        yield audio
+        return
+
+    with f:
+        sr = f.samplerate
+        blocksize = max(1, int(block_s * sr))
+        logger.debug(f"Streaming {f.frames} frames at {sr} Hz in blocks of {blocksize}")
+        if sr == SAMPLING_RATE:
+            for block in f.blocks(blocksize=blocksize, dtype="float32", always_2d=True):
+                yield to_mono(block)
+            return
+        # One resampler for the whole file keeps its filter state across blocks,
+        # so block boundaries add no edge transients.
+        resampler = resample_stream(sr)
+        for block in f.blocks(blocksize=blocksize, dtype="float32", always_2d=True):
+            yield resampler.resample_chunk(np.ascontiguousarray(to_mono(block)))
+        yield resampler.resample_chunk(np.zeros(0, dtype=np.float32), last=True)
+
+
+def iter_windows(blocks, chunk_s=20.0, stride_s=2.0):
+    """Cut a stream of 16 kHz blocks into overlapping windows.
+
+    Each window is `chunk_s` long and overlaps its neighbours by `stride_s` on
+    each side. Predictions inside the overlap are discarded (except at the very
+    start and end of the audio), so the kept ranges tile the recording exactly.
+    Only one window's worth of samples is held in memory at a time.
+    """
+    size = int(chunk_s * SAMPLING_RATE)
+    stride = int(stride_s * SAMPLING_RATE)
+    step = size - 2 * stride
+    if step <= 0:
+        raise ValueError("chunk_s must be larger than twice stride_s")
+
+    buffer = np.zeros(0, dtype=np.float32)
+    buffer_start = 0
+    window_start = 0
+    for block in blocks:
+        buffer = np.concatenate([buffer, block])
+        while buffer_start + len(buffer) >= window_start + size:
+            offset = window_start - buffer_start
+            yield Window(
+                samples=buffer[offset:offset + size],
+                start=window_start,
+                keep_start=window_start + stride if window_start > 0 else 0,
+                keep_end=window_start + size - stride
+            )
+            window_start += step
+            buffer = buffer[window_start - buffer_start:]
+            buffer_start = window_start
+
+    offset = window_start - buffer_start
+    tail = buffer[offset:]
+    keep_start = window_start + stride if window_start > 0 else 0
+    if len(tail) and window_start + len(tail) > keep_start:
+        yield Window(
+            samples=tail,
+            start=window_start,
+            keep_start=keep_start,
+            keep_end=window_start + len(tail)
+        )
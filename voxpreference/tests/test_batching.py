@@ -0,0 +1,67 @@
+"""Micro-batching must not change a clip's logits.
+
+Run from the voxpreference directory:
+
+    python -m pytest tests
+"""
+import tempfile
+import threading
+
+import numpy as np
+import pytest
+
+from batching import MicroBatcher
+
+
+def test_batch_key_keeps_lengths_apart():
+    batches = []
+    release = threading.Event()
+
+    def run_batch(items):
+        release.wait(5)
+        batches.append([len(item) for item in items])
+        return [item.sum() for item in items]
+
+    batcher = MicroBatcher(run_batch, max_batch_size=4, max_wait_ms=50, batch_key=len)
+    items = [np.ones(n) for n in (3, 5, 3, 5, 5, 3, 7)]
+    futures = [batcher.submit(item) for item in items]
+    release.set()
+
+    assert [f.result(timeout=5) for f in futures] == [item.sum() for item in items]
+    assert all(len(set(lengths)) == 1 for lengths in batches)
+    assert sorted(n for lengths in batches for n in lengths) == sorted(len(item) for item in items)
+
+
+@pytest.fixture(scope="module")
+def engine():
+    pytest.importorskip("transformers")
+    from transformers import Wav2Vec2Processor
+
+    from benchmarks.bench_app import build_tiny_model
+    from inference import EagerEngine, load_model
+
+    with tempfile.TemporaryDirectory() as directory:
+        build_tiny_model(directory)
+        processor = Wav2Vec2Processor.from_pretrained(directory)
+        model = load_model(directory, weights_dir=directory)
+        yield EagerEngine(model, processor)
+
+
+def test_batched_logits_match_solo_on_mixed_lengths(engine):
+    # The tiny model, like the served one, uses group norm and no attention mask.
+    assert not engine.use_attention_mask
+    rng = np.random.default_rng(0)
+    clips = [
+        engine.processor(rng.standard_normal(int(seconds * 16000)).astype(np.float32) * 0.1, sampling_rate=16000).input_values[0]
+        for seconds in (1, 20, 1, 3)
+    ]
+    solo = [engine.forward_batch([clip])[0] for clip in clips]
+
+    batcher = MicroBatcher(engine.forward_batch, max_batch_size=8, max_wait_ms=200, batch_key=len)
+    futures = [batcher.submit(clip) for clip in clips]
+    batched = [future.result(timeout=60) for future in futures]
+
+    for alone, together in zip(solo, batched):
+        assert alone.shape == together.shape
+        np.testing.assert_allclose(together, alone, atol=1e-4)
+        assert (together.argmax(-1) == alone.argmax(-1)).all()
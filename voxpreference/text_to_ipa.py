@@ -1,22 +1,103 @@
 import sys
 import json
 import os
-from functools import lru_cache
-from phonemizer import phonemize
-
-@lru_cache(maxsize=256)
-def _phonemize_cached(texts_tuple, language, backend, strip, preserve_punctuation, punctuation_marks, with_stress):
-    """Cached internal function for phonemization."""
-    return phonemize(
-        list(texts_tuple),
-        language=language,
-        backend=backend,
-        strip=strip,
-        preserve_punctuation=preserve_punctuation,
-        punctuation_marks=punctuation_marks,
-        with_stress=with_stress,
-        njobs=os.cpu_count() or 1 
-    )
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from phonemizer.backend import EspeakBackend
+from phonemizer.separator import default_separator
+from lexicon import open_lexicon, settings_key
+
+PHONEMIZER_ARGS = (
+    "en-us",
+    "espeak",
+    True,
+    True,
+    ';:,.!?¡¿—…"«»"()',
+    True
+)
+PHONEMIZER_KEY = settings_key(*PHONEMIZER_ARGS)
+
+IPA_BACKEND_POOL_SIZE = int(os.getenv("IPA_BACKEND_POOL_SIZE", str(os.cpu_count() or 1)))
+# Batches smaller than this are phonemized by a single backend.
+IPA_MIN_CHUNK = 64
+
+_lexicon = open_lexicon()
+
+class EspeakPool:
+    """Long-lived espeak backends, each created once and lent to one thread at a time.
+
+    Every EspeakBackend loads its own copy of libespeak-ng, so separate
+    instances can phonemize in parallel threads.
+    """
+
+    def __init__(self, size, language, strip, preserve_punctuation, punctuation_marks, with_stress):
+        self.size = max(1, size)
+        self.strip = strip
+        self._backends = queue.Queue()
+        for _ in range(self.size):
+            self._backends.put(EspeakBackend(
+                language,
+                preserve_punctuation=preserve_punctuation,
+                punctuation_marks=punctuation_marks,
+                with_stress=with_stress
+            ))
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="espeak")
+
+    def _phonemize_one(self, texts):
+        backend = self._backends.get()
+        try:
+            return backend.phonemize(texts, separator=default_separator, strip=self.strip, njobs=1)
+        finally:
+            self._backends.put(backend)
+
+    def phonemize(self, texts):
+        texts = list(texts)
+        chunk_size = max(IPA_MIN_CHUNK, -(-len(texts) // self.size))
+        if len(texts) <= chunk_size:
+            return self._phonemize_one(texts)
+        chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+        return [ipa for chunk in self._executor.map(self._phonemize_one, chunks) for ipa in chunk]
+
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_backend_pool():
+    """Create the espeak backend pool on first use and return it."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                language, _, strip, preserve_punctuation, punctuation_marks, with_stress = PHONEMIZER_ARGS
+                _pool = EspeakPool(
+                    IPA_BACKEND_POOL_SIZE, language, strip, preserve_punctuation, punctuation_marks, with_stress
+                )
+    return _pool
+
+def _phonemize(texts):
+    """Internal function for phonemization."""
+    return get_backend_pool().phonemize(texts)
+
+def _phonemize_with_lexicon(texts):
+    """Phonemize texts, looking each one up in the persistent lexicon before running espeak."""
+    if _lexicon is None:
+        return _phonemize(texts)
+    known = _lexicon.get_many(PHONEMIZER_KEY, set(texts))
+    missing = list(dict.fromkeys(text for text in texts if text not in known))
+    if missing:
+        fresh = dict(zip(missing, _phonemize(missing)))
+        _lexicon.put_many(PHONEMIZER_KEY, fresh)
+        known.update(fresh)
+    return [known[text] for text in texts]
+
+def prewarm_lexicon(words, batch_size=5000):
+    """Phonemize a word list into the persistent lexicon; returns the number of words looked up."""
+    if _lexicon is None:
+        raise RuntimeError("IPA lexicon is disabled (IPA_LEXICON_PATH is empty).")
+    words = list(dict.fromkeys(word.strip() for word in words if word.strip()))
+    for i in range(0, len(words), batch_size):
+        _phonemize_with_lexicon(words[i:i + batch_size])
+    return len(words)
 
 def convert_to_ipa(text):
     try:
@@ -32,16 +113,7 @@ def convert_to_ipa(text):
         if not texts:
             return {"success": True, "ipa": "" if is_string_input else []}
 
-        phonemizer_args = (
-            "en-us",
-            "espeak",
-            True,
-            True,
-            ';:,.!?¡¿—…"«»"()',
-            True
-        )
-        
-        ipa_list = _phonemize_cached(tuple(texts), *phonemizer_args)
+        ipa_list = _phonemize_with_lexicon(texts)
         
         result_ipa = "\n".join(ipa_list) if is_string_input else ipa_list
 
@@ -55,6 +127,24 @@ def convert_to_ipa(text):
             "error": str(e)
         }
 
+def convert_words_to_ipa(words):
+    """Phonemize many words with a single phonemizer call.
+
+    Returns a dict mapping each distinct word to a convert_to_ipa-style result.
+    If the batched call fails, words are retried one by one so that each word
+    keeps its own error.
+    """
+    unique_words = list(dict.fromkeys(word for word in words if isinstance(word, str) and word.strip()))
+    if not unique_words:
+        return {}
+    batch_result = convert_to_ipa(unique_words)
+    if batch_result["success"]:
+        return {
+            word: {"success": True, "ipa": ipa}
+            for word, ipa in zip(unique_words, batch_result["ipa"])
+        }
+    return {word: convert_to_ipa(word) for word in unique_words}
+
 if __name__ == "__main__":
     text = sys.stdin.read()
     result = convert_to_ipa(text)
@@ -0,0 +1,124 @@
+"""Build or refresh the audio corpus manifest (one row per WAV file).
+
+Headers are read in a process pool, and only files whose size or mtime
+changed since the last run are re-read; the rest are carried over from the
+existing manifest. Columns: path, prefix (ngm/ngf), speaker, duration,
+sample_rate, size, mtime.
+
+The manifest is Parquet when pyarrow (or fastparquet) is installed; without
+one, a .parquet path is swapped for a CSV file next to it.
+
+Run from the voxpreference directory:
+
+    python -m utils.build_manifest
+    python -m utils.build_manifest --audio-dir data/SpeechFiles --out data/manifest.parquet
+"""
+import argparse
+import importlib.util
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import soundfile as sf
+
+AUDIO_DIR = "data/SpeechFiles"
+MANIFEST_PATH = "data/manifest.parquet"
+COLUMNS = ["path", "prefix", "speaker", "duration", "sample_rate", "size", "mtime"]
+
+
+def manifest_path(out):
+    """`out`, or the same path with a .csv extension if it is Parquet and no Parquet engine is installed."""
+    root, ext = os.path.splitext(out)
+    if ext == ".parquet" and not any(importlib.util.find_spec(engine) for engine in ("pyarrow", "fastparquet")):
+        return f"{root}.csv"
+    return out
+
+
+def read_manifest(path):
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+def write_manifest(manifest, path):
+    if path.endswith(".parquet"):
+        manifest.to_parquet(path, index=False)
+    else:
+        manifest.to_csv(path, index=False)
+
+
+def scan_file(entry):
+    """Read one file's header; returns a manifest row, or None if it can't be read."""
+    path, size, mtime = entry
+    try:
+        info = sf.info(path)
+    except Exception as e:
+        print(f"Error reading {path}: {e}")
+        return None
+    name = os.path.basename(path)
+    parts = name.split("_")
+    return {
+        "path": path,
+        "prefix": parts[0],
+        "speaker": "_".join(parts[:2]) if len(parts) > 2 else parts[0],
+        "duration": info.frames / info.samplerate,
+        "sample_rate": info.samplerate,
+        "size": size,
+        "mtime": mtime,
+    }
+
+
+def list_audio(audio_dir):
+    """(path, size, mtime) of every WAV in audio_dir, from one directory scan."""
+    entries = []
+    with os.scandir(audio_dir) as it:
+        for entry in it:
+            if entry.name.endswith(".wav") and entry.is_file():
+                stat = entry.stat()
+                entries.append((os.path.join(audio_dir, entry.name), stat.st_size, stat.st_mtime_ns))
+    return entries
+
+
+def build_manifest(audio_dir=AUDIO_DIR, out=MANIFEST_PATH, workers=None):
+    """Update the manifest at `out` (see manifest_path) to match audio_dir and return it as a DataFrame."""
+    out = manifest_path(out)
+    entries = list_audio(audio_dir)
+    previous = read_manifest(out) if os.path.exists(out) else pd.DataFrame(columns=COLUMNS)
+    known = {(row.path, row.size, row.mtime) for row in previous.itertuples(index=False)}
+
+    unchanged = {entry for entry in entries if entry in known}
+    to_scan = [entry for entry in entries if entry not in unchanged]
+    kept = previous[[(p, s, m) in unchanged for p, s, m in zip(previous["path"], previous["size"], previous["mtime"])]]
+
+    scanned = []
+    if to_scan:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            scanned = [row for row in pool.map(scan_file, to_scan, chunksize=64) if row is not None]
+    print(f"{len(entries)} files: {len(unchanged)} unchanged, {len(scanned)} scanned, {len(to_scan) - len(scanned)} unreadable, "
+          f"{len(previous) - len(kept)} dropped from the previous manifest")
+
+    manifest = pd.concat([kept, pd.DataFrame(scanned, columns=COLUMNS)], ignore_index=True)
+    manifest = manifest.sort_values("path").reset_index(drop=True)
+    if to_scan or len(kept) != len(previous):
+        os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+        tmp_path = f"{out}.tmp{os.path.splitext(out)[1]}"
+        write_manifest(manifest, tmp_path)
+        os.replace(tmp_path, out)
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--audio-dir", default=AUDIO_DIR)
+    parser.add_argument("--out", default=MANIFEST_PATH)
+    parser.add_argument("--workers", type=int, default=None, help="header-reading processes (default: CPUs)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    manifest = build_manifest(args.audio_dir, args.out, args.workers)
+    print(f"Wrote {len(manifest)} rows to {manifest_path(args.out)} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
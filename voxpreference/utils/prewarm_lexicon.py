@@ -0,0 +1,48 @@
+"""Pre-populate the persistent IPA lexicon from a word list.
+
+Run from the voxpreference directory:
+
+    python -m utils.prewarm_lexicon --nltk
+    python -m utils.prewarm_lexicon --words-file my_words.txt
+"""
+import argparse
+import time
+
+from text_to_ipa import PHONEMIZER_KEY, _lexicon, prewarm_lexicon
+
+
+def load_nltk_words():
+    try:
+        import nltk
+        from nltk.corpus import words
+    except ImportError:
+        raise SystemExit("The --nltk option needs nltk: pip install nltk")
+    nltk.download("words", quiet=True)
+    return [word.lower() for word in words.words()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--nltk", action="store_true", help="use the nltk words corpus")
+    parser.add_argument("--words-file", help="text file with one word per line")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    args = parser.parse_args()
+
+    words = []
+    if args.nltk:
+        words.extend(load_nltk_words())
+    if args.words_file:
+        with open(args.words_file, encoding="utf-8") as f:
+            words.extend(f.read().split())
+    if not words:
+        parser.error("give --nltk and/or --words-file")
+
+    start = time.perf_counter()
+    count = prewarm_lexicon(words, batch_size=args.batch_size)
+    elapsed = time.perf_counter() - start
+    print(f"Looked up {count} words in {elapsed:.1f}s")
+    print(f"Lexicon {_lexicon.path} now holds {_lexicon.count(PHONEMIZER_KEY)} entries for these settings")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,9 @@
+# Run from the voxpreference directory: python -m utils.split_shuffle_data
 import pandas as pd
 from sklearn.model_selection import train_test_split
 
+from utils.build_manifest import build_manifest
+
 # Load both TSVs
 male = pd.read_csv('data/line_index_male.tsv', sep='\t', names=['path', 'transcript'])
 female = pd.read_csv('data/line_index_female.tsv', sep='\t', names=['path', 'transcript'])
@@ -11,6 +14,13 @@ combined = pd.concat([male, female], ignore_index=True)
 # Add the folder path to the audio files
 combined['path'] = combined['path'].apply(lambda x: f"data/SpeechFiles/{x}.wav")
 
+# Attach durations from the corpus manifest (used for length bucketing); clips missing from it are unreadable.
+manifest = build_manifest()
+listed = len(combined)
+combined = combined.merge(manifest[['path', 'duration']], on='path', how='inner')
+if len(combined) < listed:
+    print(f"Dropped {listed - len(combined)} of {listed} transcribed clips missing from the manifest (unreadable or absent audio)")
+
 # Shuffle
 combined = combined.sample(frac=1, random_state=42).reset_index(drop=True)
 
@@ -21,4 +31,5 @@ train_df, val_df = train_test_split(combined, test_size=0.1, random_state=42)
 train_df.to_csv('data/train.csv', index=False)
 val_df.to_csv('data/val.csv', index=False)
 
-print(f"Train samples: {len(train_df)}, Validation samples: {len(val_df)}")
\ No newline at end of file
+print(f"Train samples: {len(train_df)} ({train_df['duration'].sum()/3600:.2f} h), "
+      f"Validation samples: {len(val_df)} ({val_df['duration'].sum()/3600:.2f} h)")
\ No newline at end of file
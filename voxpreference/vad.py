@@ -0,0 +1,111 @@
+import bisect
+import os
+
+import numpy as np
+
+SAMPLING_RATE = 16000
+
+VAD_ENABLED = os.getenv("VAD_ENABLED", "1") == "1"
+# Frames whose RMS level is below this (dB relative to full scale) count as silence.
+VAD_THRESHOLD_DB = float(os.getenv("VAD_THRESHOLD_DB", "-45"))
+# Only silences at least this long are dropped; shorter pauses stay in.
+VAD_MIN_SILENCE_S = float(os.getenv("VAD_MIN_SILENCE_S", "0.5"))
+# Audio kept on each side of detected speech.
+VAD_PAD_S = float(os.getenv("VAD_PAD_S", "0.2"))
+# 20 ms frames match the model's output frame rate.
+FRAME_LENGTH = 320
+
+
+def vad_settings():
+    return f"vad={int(VAD_ENABLED)}:{VAD_THRESHOLD_DB}:{VAD_MIN_SILENCE_S}:{VAD_PAD_S}"
+
+
+class TrimMap:
+    """Maps times on the trimmed (speech-only) timeline back to the original recording."""
+
+    def __init__(self):
+        self.regions = []  # (original_start, original_end) sample ranges that were kept
+        self._trimmed_starts = []
+        self.kept_samples = 0
+        self.total_samples = 0
+
+    def add(self, regions, block_samples):
+        for start, end in regions:
+            self._trimmed_starts.append(self.kept_samples)
+            self.regions.append((start, end))
+            self.kept_samples += end - start
+        self.total_samples += block_samples
+
+    @property
+    def dropped_ratio(self):
+        return 1.0 - self.kept_samples / self.total_samples if self.total_samples else 0.0
+
+    def to_original(self, seconds):
+        """Original-recording time (s) of a position on the trimmed timeline."""
+        if not self.regions:
+            return seconds
+        sample = seconds * SAMPLING_RATE
+        i = max(0, bisect.bisect_right(self._trimmed_starts, sample) - 1)
+        start, end = self.regions[i]
+        return min(end, start + sample - self._trimmed_starts[i]) / SAMPLING_RATE
+
+
+def speech_regions(audio, offset=0):
+    """Sample ranges ([start, end), shifted by `offset`) that contain speech, padded and merged."""
+    n_frames = len(audio) // FRAME_LENGTH + (1 if len(audio) % FRAME_LENGTH else 0)
+    if n_frames == 0:
+        return []
+    padded = np.zeros(n_frames * FRAME_LENGTH, dtype=np.float32)
+    padded[:len(audio)] = audio
+    rms = np.sqrt(np.mean(padded.reshape(n_frames, FRAME_LENGTH) ** 2, axis=1))
+    speech = 20 * np.log10(np.maximum(rms, 1e-10)) > VAD_THRESHOLD_DB
+    if not speech.any():
+        return []
+
+    pad = int(round(VAD_PAD_S * SAMPLING_RATE / FRAME_LENGTH))
+    min_gap = int(round(VAD_MIN_SILENCE_S * SAMPLING_RATE / FRAME_LENGTH))
+    # Start/end frame indices of runs of speech frames.
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], speech.astype(np.int8), [0]])))
+    regions = []
+    for start, end in zip(edges[::2], edges[1::2]):
+        start, end = max(0, start - pad), min(n_frames, end + pad)
+        if regions and start - regions[-1][1] < min_gap:
+            regions[-1][1] = end
+        else:
+            regions.append([start, end])
+    return [
+        (offset + start * FRAME_LENGTH, offset + min(len(audio), end * FRAME_LENGTH))
+        for start, end in regions
+    ]
+
+
+def trim_silence(audio, trim_map, offset=0, keep_if_silent=True):
+    """Drop non-speech from `audio` (which starts at sample `offset` of the recording).
+
+    Kept regions are recorded in `trim_map`. With `keep_if_silent`, audio with
+    too little detected speech is returned unchanged, so the model always gets a
+    usable input.
+    """
+    if not VAD_ENABLED:
+        regions = [(offset, offset + len(audio))]
+    else:
+        regions = speech_regions(audio, offset)
+        if keep_if_silent and sum(end - start for start, end in regions) < 0.1 * SAMPLING_RATE:
+            regions = [(offset, offset + len(audio))]
+    if not regions:
+        trim_map.add([], len(audio))
+        return audio[:0]
+    trim_map.add(regions, len(audio))
+    if len(regions) == 1 and regions[0] == (offset, offset + len(audio)):
+        return audio
+    return np.concatenate([audio[start - offset:end - offset] for start, end in regions])
+
+
+def iter_trimmed(blocks, trim_map):
+    """Apply trim_silence to a stream of consecutive blocks; silent blocks are dropped entirely."""
+    offset = 0
+    for block in blocks:
+        trimmed = trim_silence(block, trim_map, offset, keep_if_silent=False)
+        offset += len(block)
+        if len(trimmed):
+            yield trimmed
@@ -0,0 +1,256 @@
+import itertools
+import logging
+import multiprocessing
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+from inference import WEIGHTS_DIR
+from metrics import metrics
+
+logger = logging.getLogger("voxpreference.workers")
+
+# Number of model worker processes; 0 runs the forward pass in the app process.
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", "0"))
+# Torch intra-op threads per worker; 0 splits the machine's cores evenly.
+INFERENCE_WORKER_THREADS = int(os.getenv("INFERENCE_WORKER_THREADS", "0"))
+WORKER_STARTUP_TIMEOUT_S = float(os.getenv("WORKER_STARTUP_TIMEOUT_S", "600"))
+# A worker that keeps dying is restarted after 1, 2, 4, ... seconds, up to this long.
+WORKER_RESTART_MAX_BACKOFF_S = float(os.getenv("WORKER_RESTART_MAX_BACKOFF_S", "60"))
+
+
+class WorkerCrashed(RuntimeError):
+    pass
+
+
+def _worker_main(worker_id, model_id, weights_dir, backend, num_threads, requests, results):
+    """Worker process: load the model (memory-mapped), then run forward passes until told to stop."""
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO").upper(),
+        format=f"%(asctime)s | %(levelname)s | %(name)s[worker {worker_id}] | %(message)s",
+        stream=sys.stdout
+    )
+    import torch
+    from transformers import Wav2Vec2Processor
+    from inference import create_engine, load_model, warm_up
+
+    torch.set_num_threads(num_threads)
+    try:
+        processor = Wav2Vec2Processor.from_pretrained(model_id)
+        engine = create_engine(backend, load_model(model_id, weights_dir), processor)
+        warm_up(engine)
+    except Exception as e:
+        results.put((worker_id, None, "failed", f"{type(e).__name__}: {e}"))
+        return
+    results.put((worker_id, None, "ready", os.getpid()))
+
+    while True:
+        job = requests.get()
+        if job is None:
+            return
+        job_id, batch = job
+        try:
+            results.put((worker_id, job_id, "ok", engine.forward_batch(batch)))
+        except Exception as e:
+            results.put((worker_id, job_id, "error", f"{type(e).__name__}: {e}"))
+
+
+class _Worker:
+    def __init__(self, worker_id):
+        self.id = worker_id
+        self.process = None
+        self.requests = None
+        self.ready = False
+        self.pid = None
+        self.pending = {}  # job_id -> Future
+        self.restarts = 0
+        self.backoff = 0.0
+        self.restart_at = None  # monotonic time of the scheduled restart, once the process has died
+        self.last_error = None
+
+
+class WorkerPool:
+    """Supervised pool of processes that each run forward passes on their own copy of the engine.
+
+    Workers load the model with inference.load_model, which memory-maps the
+    exported state dict, so every process maps the same page-cache pages instead
+    of holding a private copy of the fp32 weights (int8 and onnx backends build
+    private weights per worker). Each worker gets `num_threads` torch threads.
+
+    Batches go to the ready worker with the fewest batches in flight. A worker
+    that dies (or fails to load after a restart) fails its in-flight batches
+    with WorkerCrashed and is restarted, immediately the first time and then
+    with exponential backoff until it reports ready again. While no worker is
+    ready, batches fail at once instead of queueing.
+    """
+
+    def __init__(self, model_id, backend, num_workers, num_threads=0):
+        self.model_id = model_id
+        self.backend = backend
+        self.num_threads = num_threads or max(1, (os.cpu_count() or 1) // num_workers)
+        self._context = multiprocessing.get_context("spawn")
+        self._results = self._context.Queue()
+        self._workers = [_Worker(i) for i in range(num_workers)]
+        self._lock = threading.Lock()
+        self._job_ids = itertools.count()
+        self._startup_error = None
+        self._started = False
+        self._stopping = False
+        self._collector = threading.Thread(target=self._collect, name="worker-pool-collector", daemon=True)
+
+    def start(self, timeout=WORKER_STARTUP_TIMEOUT_S):
+        """Start the workers and block until all of them are ready.
+
+        The first worker starts alone, so any one-time export (weights, ONNX
+        graph) happens once before the others map its output.
+        """
+        logger.info(f"Starting {len(self._workers)} inference worker(s) with {self.num_threads} torch thread(s) each")
+        self._collector.start()
+        first, rest = self._workers[0], self._workers[1:]
+        try:
+            self._spawn(first)
+            self._wait_ready([first], timeout)
+            for worker in rest:
+                self._spawn(worker)
+            self._wait_ready(rest, timeout)
+        except Exception:
+            self.close()
+            raise
+        self._started = True
+
+    def _spawn(self, worker):
+        # The weights directory is passed explicitly so workers map exactly the file this process exported.
+        worker.requests = self._context.Queue()
+        worker.ready = False
+        process = self._context.Process(
+            target=_worker_main,
+            args=(worker.id, self.model_id, WEIGHTS_DIR, self.backend, self.num_threads, worker.requests, self._results),
+            name=f"inference-worker-{worker.id}",
+            daemon=True
+        )
+        process.start()
+        worker.process = process
+
+    def _wait_ready(self, workers, timeout):
+        deadline = time.monotonic() + timeout
+        while not all(worker.ready for worker in workers):
+            if self._startup_error:
+                raise RuntimeError(f"Inference worker failed to start: {self._startup_error}")
+            for worker in workers:
+                if not worker.process.is_alive() and not worker.ready:
+                    raise RuntimeError(f"Inference worker {worker.id} exited with code {worker.process.exitcode} while starting")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"Inference workers not ready after {timeout:.0f}s")
+            time.sleep(0.1)
+        self._publish()
+
+    def submit(self, batch):
+        """Queue a batch on the least-loaded worker and return a Future for its per-item logits."""
+        future = Future()
+        with self._lock:
+            worker = min(self._workers, key=lambda w: (not w.ready, len(w.pending)))
+            if not worker.ready:
+                future.set_exception(WorkerCrashed("No inference worker is ready"))
+                return future
+            job_id = next(self._job_ids)
+            worker.pending[job_id] = future
+            worker.requests.put((job_id, batch))
+        return future
+
+    def forward_batch(self, batch):
+        """Blocking equivalent of InferenceEngine.forward_batch, run in a worker process."""
+        return self.submit(batch).result()
+
+    def _collect(self):
+        while not self._stopping:
+            try:
+                worker_id, job_id, status, payload = self._results.get(timeout=1.0)
+            except queue.Empty:
+                self._supervise()
+                continue
+            worker = self._workers[worker_id]
+            if status == "ready":
+                worker.ready, worker.pid, worker.backoff, worker.last_error = True, payload, 0.0, None
+                logger.info(f"Inference worker {worker_id} ready (pid {payload})")
+                self._publish()
+            elif status == "failed":
+                logger.error(f"Inference worker {worker_id} failed to start: {payload}")
+                worker.last_error = payload
+                if not self._started:
+                    self._startup_error = payload
+            else:
+                with self._lock:
+                    future = worker.pending.pop(job_id, None)
+                if future is None:
+                    continue
+                if status == "ok":
+                    future.set_result(payload)
+                else:
+                    future.set_exception(RuntimeError(payload))
+            self._supervise()
+
+    def _supervise(self):
+        """Fail the batches of workers that died and restart them, backing off while they keep failing."""
+        if not self._started:
+            # start() reports failures of the initial start itself.
+            return
+        now = time.monotonic()
+        for worker in self._workers:
+            if self._stopping or worker.process is None:
+                continue
+            if worker.restart_at is None and not worker.process.is_alive():
+                with self._lock:
+                    pending, worker.pending = worker.pending, {}
+                    worker.ready = False
+                    worker.restart_at = now + worker.backoff
+                exitcode = worker.process.exitcode
+                logger.error(
+                    f"Inference worker {worker.id} exited with code {exitcode}; restarting in {worker.backoff:.0f}s, "
+                    f"failing {len(pending)} batch(es)"
+                )
+                for future in pending.values():
+                    future.set_exception(WorkerCrashed(f"Inference worker {worker.id} exited with code {exitcode}"))
+                worker.backoff = min(max(1.0, 2 * worker.backoff), WORKER_RESTART_MAX_BACKOFF_S)
+                self._publish()
+            if worker.restart_at is not None and now >= worker.restart_at:
+                with self._lock:
+                    worker.restarts += 1
+                    try:
+                        self._spawn(worker)
+                        worker.restart_at = None
+                    except Exception as e:
+                        worker.last_error = f"{type(e).__name__}: {e}"
+                        worker.restart_at = now + worker.backoff
+                        worker.backoff = min(2 * worker.backoff, WORKER_RESTART_MAX_BACKOFF_S)
+                        logger.exception(f"Could not restart inference worker {worker.id}: {e}")
+                metrics.inc("inference_worker_restarts_total")
+
+    def _publish(self):
+        metrics.set("inference_workers_ready", self.ready_count())
+
+    def ready_count(self):
+        return sum(worker.ready for worker in self._workers)
+
+    def stats(self):
+        with self._lock:
+            return [
+                {
+                    "id": w.id, "pid": w.pid, "ready": w.ready, "in_flight": len(w.pending),
+                    "restarts": w.restarts, "last_error": w.last_error
+                }
+                for w in self._workers
+            ]
+
+    def close(self):
+        self._stopping = True
+        for worker in self._workers:
+            if worker.process is not None and worker.process.is_alive():
+                worker.requests.put(None)
+        for worker in self._workers:
+            if worker.process is not None:
+                worker.process.join(timeout=5)
+                if worker.process.is_alive():
+                    worker.process.terminate()